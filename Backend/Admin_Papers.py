@@ -1,12 +1,18 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from database import get_db
+from pastMongo import index_paper, remove_paper
 
 admin = Blueprint("admin", __name__)
 
-db = get_db()
-research_collection = db["Past_Research_projects"]
-capstone_collection = db["Capstone_projects"]
+
+# Looked up per request, so a pre-fork master's client is never kept (see database.py)
+def research_collection():
+    return get_db()["Past_Research_projects"]
+
+
+def capstone_collection():
+    return get_db()["Capstone_projects"]
 
 # Helper to convert MongoDB documents to JSON
 def serialize(doc):
@@ -18,8 +24,8 @@ def serialize(doc):
 # -----------------------------
 @admin.route("/all", methods=["GET"])
 def get_all_papers():
-    research = list(research_collection.find())
-    capstone = list(capstone_collection.find())
+    research = list(research_collection().find())
+    capstone = list(capstone_collection().find())
 
     research = [serialize(r) for r in research]
     capstone = [serialize(c) for c in capstone]
@@ -38,8 +44,9 @@ def add_paper():
     data = request.json
     paper_type = data.get("type", "research")
 
-    collection = research_collection if paper_type == "research" else capstone_collection
+    collection = research_collection() if paper_type == "research" else capstone_collection()
     result = collection.insert_one(data)
+    index_paper(data, paper_type)
 
     return jsonify({"message": "Paper added", "id": str(result.inserted_id)}), 201
 
@@ -52,7 +59,7 @@ def update_paper(paper_id):
     data = request.json
     paper_type = data.get("type", "research")
 
-    collection = research_collection if paper_type == "research" else capstone_collection
+    collection = research_collection() if paper_type == "research" else capstone_collection()
 
     result = collection.update_one(
         {"_id": ObjectId(paper_id)},
@@ -62,6 +69,8 @@ def update_paper(paper_id):
     if result.matched_count == 0:
         return jsonify({"error": "Paper not found"}), 404
 
+    index_paper(collection.find_one({"_id": ObjectId(paper_id)}), paper_type)
+
     return jsonify({"message": "Paper updated"}), 200
 
 
@@ -72,11 +81,13 @@ def update_paper(paper_id):
 def delete_paper(paper_id):
     paper_type = request.args.get("type", "research")
 
-    collection = research_collection if paper_type == "research" else capstone_collection
+    collection = research_collection() if paper_type == "research" else capstone_collection()
 
     result = collection.delete_one({"_id": ObjectId(paper_id)})
 
     if result.deleted_count == 0:
         return jsonify({"error": "Paper not found"}), 404
 
+    remove_paper(paper_id, paper_type)
+
     return jsonify({"message": "Paper deleted"}), 200
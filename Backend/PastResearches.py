@@ -3,20 +3,30 @@
 # ----------------------------
 # pip install pandas langchain langchain-community chromadb sentence-transformers textblob flask flask-cors
 
-import pandas as pd
+import threading
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
-from langchain_core.documents import Document  # fixed import
 from textblob import TextBlob
 from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
+from dataset_cache import load_dataset
+from dataset_records import DEFAULT_PROJECT_FIELDS, dataframe_to_documents, dataframe_to_records
+from embedding_models import get_embeddings
+from embedding_pipeline import EmbeddingPipeline
+from search_cache import (
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL_S,
+    TTLCache,
+    normalize_query,
+)
 
 # ----------------------------
 # Step 1: Load Excel and Handle Missing Values
 # ----------------------------
-df = pd.read_excel("./datas/sample_research_dataset_detailed.xlsx")
-df1=pd.read_excel("./datas/capstone_project_dataset.xlsx")
+# Memory-mapped from the columnar cache after the first parse (dataset_cache.py)
+df = load_dataset("./datas/sample_research_dataset_detailed.xlsx")
+df1 = load_dataset("./datas/capstone_project_dataset.xlsx")
 
 # Debug: Print column names to verify
 print("Columns in the dataframe:", df.columns)
@@ -28,71 +38,60 @@ df1.fillna("N/A", inplace=True)
 # ----------------------------
 # Step 2: Create chunk text per project
 # ----------------------------
-documents = []
-for idx, row in df.iterrows():
-    try:
-        text = f"""
-Title: {row['Title']}
-Abstract: {row['Abstract']}
-Year: {row['Year']}
-Author: {row['Author']}
-"""
-        metadata = {
-            "Title": row['Title'],
-            "Abstract": row['Abstract'],
-            "Year": row['Year'],
-            "Author": row['Author']
-        }
-        documents.append(Document(page_content=text.strip(), metadata=metadata))
-    except KeyError as e:
-        print(f"Missing column in row {idx}: {e}")
-
-
-capstone_documents = []
-for idx,row in df1.iterrows():
-    try:
-        text = f"""
-Title: {row['Title']}
-Abstract: {row['Abstract']}
-Year: {row['Year']}
-Author: {row['Author']}
-"""
-        metadata = {
-            "Title": row['Title'],
-            "Abstract": row['Abstract'],
-            "Year": row['Year'],
-            "Author": row['Author']
-        }
-        capstone_documents.append(Document(page_content=text.strip(), metadata=metadata))
-    except KeyError as e:
-        print(f"Missing column in row {idx}: {e}")
-
+# Built column-wise (dataset_records.py), one Document per project
+documents = dataframe_to_documents(df)
+capstone_documents = dataframe_to_documents(df1)
 
 
 # ----------------------------
 # Step 4: Create embeddings
 # ----------------------------
-# Use a strong semantic model
-embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+# Use a strong semantic model, shared with every other search module in the process
+# (query vectors are memoised so repeated searches skip the encoder)
+embeddings_model = None
+retriever = None
+retriever1 = None
+_index_lock = threading.Lock()
 
 # ----------------------------
 # Step 5: Store documents in vector database
 # ----------------------------
-Research_vectorstore = Chroma.from_documents(
-    documents=documents,
-    embedding=embeddings_model,
-    collection_name="researchprojects_database"
-)
-retriever = Research_vectorstore.as_retriever(search_kwargs={"k": 10})  # top 10 relevant chunks
-
-
-capstone_vectorstore=Chroma.from_documents(
-    documents=capstone_documents,
-    embedding=embeddings_model,
-    collection_name="capstoneprojects_database"
-)
-
-retriever1=capstone_vectorstore.as_retriever(search_kwargs={"k":10})
+# Built by build_indexes(), at startup under __main__ or on the first search,
+# never at import: with EMBED_WORKERS > 1 the pipeline starts "spawn" workers,
+# which re-import this module.
+def build_indexes():
+    global embeddings_model, retriever, retriever1
+
+    with _index_lock:
+        if retriever is not None:
+            return
+        model = get_embeddings()
+
+        # Documents are encoded in batches (optionally across EMBED_WORKERS processes)
+        # and written into the collections with precomputed vectors.
+        embedding_pipeline = EmbeddingPipeline(model)
+        try:
+            Research_vectorstore = Chroma(
+                collection_name="researchprojects_database",
+                embedding_function=model,
+            )
+            embedding_pipeline.index_documents(Research_vectorstore, documents, label="researchprojects_database")
+
+            capstone_vectorstore=Chroma(
+                collection_name="capstoneprojects_database",
+                embedding_function=model,
+            )
+            embedding_pipeline.index_documents(capstone_vectorstore, capstone_documents, label="capstoneprojects_database")
+        finally:
+            embedding_pipeline.close()
+
+        embeddings_model = model
+        retriever1 = capstone_vectorstore.as_retriever(search_kwargs={"k":10})
+        retriever = Research_vectorstore.as_retriever(search_kwargs={"k": 10})  # top 10 relevant chunks
+
+# (normalized query, collection_type, k) -> formatted results.
+# The Excel datasets are loaded once at startup, so entries only expire by TTL.
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S)
 
 # ----------------------------
 # Step 6: Function to search projects intelligently
@@ -101,6 +100,13 @@ def search_projects(user_query, collection_type='research'):
    
     print(f"Query used: {user_query} (collection={collection_type})")
 
+    cache_key = (normalize_query(user_query), collection_type, 10)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    build_indexes()
+
     # Choose the retriever depending on requested collection
     if collection_type == 'capstone':
         results = retriever1.invoke(user_query)
@@ -124,6 +130,7 @@ def search_projects(user_query, collection_type='research'):
             "type": collection_type,
             
         })
+    result_cache.set(cache_key, formatted_results)
     return formatted_results
 
 # ----------------------------
@@ -162,22 +169,12 @@ def get_default_projects(collection_type='research', limit=10):
     """
     Returns default projects from the selected collection.
     """
-    default_results = []
-
     if collection_type == 'capstone':
         df_to_use = df1  # capstone dataset
     else:
         df_to_use = df   # research dataset
 
-    for idx, row in df_to_use.head(limit).iterrows():
-        default_results.append({
-            "title": row["Title"],
-            "authors": row["Author"],
-            "description": row["Abstract"],
-            "year": row["Year"],
-            "type": collection_type,
-        })
-    return default_results
+    return dataframe_to_records(df_to_use, DEFAULT_PROJECT_FIELDS, limit=limit, type=collection_type)
 
 
 
@@ -218,6 +215,14 @@ def search_api():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats_api():
+    return jsonify({
+        "query_embeddings": embeddings_model.cache.stats() if embeddings_model else None,
+        "results": result_cache.stats(),
+    }), 200
+
+
 @app.route("/search", methods=["OPTIONS"])
 def search_options():
     resp = make_response()
@@ -233,6 +238,7 @@ from routes.admin_route import admin_bp
 app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
 if __name__ == "__main__":
+    build_indexes()
     app.run(port=5000, debug=True)
 
 
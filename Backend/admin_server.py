@@ -29,7 +29,8 @@ def home():
 
 @app.route('/health')
 def health_check():
-    return {'status': 'healthy', 'service': 'admin-panel'}
+    from database import get_pool_stats
+    return {'status': 'healthy', 'service': 'admin-panel', 'mongo_pool': get_pool_stats()}
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -45,8 +46,18 @@ if __name__ == "__main__":
     print("  - GET  /api/admin/research")
     print("  - POST /api/admin/research")
     print("  - POST /api/admin/research/bulk-upload")
+    print("  - GET  /api/admin/research/bulk-upload/<job_id>")
     print("  - GET  /api/admin/dashboard/stats")
     print("=" * 60)
+
+    # Create / verify the admin collection indexes (once per process)
+    from db_indexes import bootstrap_indexes
+    bootstrap_indexes()
+    # Pick up bulk uploads interrupted by the last shutdown (claimed atomically,
+    # so the reloader's parent and child never run the same job)
+    from controller.bulk_jobs import resume_jobs
+    resume_jobs()
+
     print("\n✅ Server is ready! Press Ctrl+C to stop.\n")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
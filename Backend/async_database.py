@@ -0,0 +1,132 @@
+"""
+async_database.py
+Async (Motor) data access for the FastAPI services.
+
+Same database and collections as database.py, but every call is awaitable,
+so endpoints in chat.py / Trendingtopics.py / ollama_*.py can read and write
+without blocking the event loop (past_search_asgi.py serves /past/default
+through find_papers). The client reuses database.py's pool and
+timeout settings and is created once per process, on first use.
+
+MONGO_ASYNC_BACKEND=mock swaps Motor for an in-memory mongomock-motor
+database with the same API, for local runs and tests without a server.
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from database import DB_NAME, PAPER_PROJECTION, client_options, mongo_url
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    MOTOR_AVAILABLE = True
+except Exception:
+    MOTOR_AVAILABLE = False
+
+try:
+    from mongomock_motor import AsyncMongoMockClient
+    MONGOMOCK_AVAILABLE = True
+except Exception:
+    MONGOMOCK_AVAILABLE = False
+
+load_dotenv()
+
+MONGO_ASYNC_BACKEND = os.getenv("MONGO_ASYNC_BACKEND", "motor")
+
+COLLECTIONS = {
+    "research": "Past_Research_projects",
+    "capstone": "Capstone_projects",
+    "mentors": "Mentors",
+    "users": "users",
+    "research_entries": "research_entries",
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _new_client(backend):
+    if backend == "mock":
+        if not MONGOMOCK_AVAILABLE:
+            raise RuntimeError("mongomock-motor is not installed; pip install mongomock-motor")
+        return AsyncMongoMockClient()
+
+    if not MOTOR_AVAILABLE:
+        raise RuntimeError("motor is not installed; pip install motor or set MONGO_ASYNC_BACKEND=mock")
+    return AsyncIOMotorClient(mongo_url(), **client_options())
+
+
+def get_async_client():
+    """The shared async client of this process (Motor or the mock)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _new_client(MONGO_ASYNC_BACKEND)
+    return _client
+
+
+def use_mock_database():
+    """Switch this process to a fresh in-memory database (for tests); returns it"""
+    global _client
+    with _client_lock:
+        _client = _new_client("mock")
+    return get_async_db()
+
+
+def get_async_db():
+    return get_async_client()[DB_NAME]
+
+
+def collection(name):
+    """Async collection by short name (see COLLECTIONS) or full name"""
+    return get_async_db()[COLLECTIONS.get(name, name)]
+
+
+def _serialize(doc):
+    if doc is not None and "_id" in doc:
+        doc["_id"] = str(doc["_id"])
+    return doc
+
+# -------------------------------------------------
+# Past research / capstone papers
+# -------------------------------------------------
+async def find_papers(collection_type="research", query=None, limit=10, skip=0):
+    cursor = collection(collection_type).find(query or {}, PAPER_PROJECTION).skip(skip).limit(limit)
+    return [_serialize(doc) async for doc in cursor]
+
+
+async def count_papers(collection_type="research", query=None):
+    return await collection(collection_type).count_documents(query or {})
+
+# -------------------------------------------------
+# Mentors
+# -------------------------------------------------
+async def find_mentors(limit=0):
+    cursor = collection("mentors").find({}, {"_id": 0}).limit(limit)
+    return [doc async for doc in cursor]
+
+# -------------------------------------------------
+# Users
+# -------------------------------------------------
+async def find_user_by_email(email):
+    return _serialize(await collection("users").find_one({"email": email}))
+
+
+async def insert_user(user):
+    result = await collection("users").insert_one(dict(user))
+    return str(result.inserted_id)
+
+# -------------------------------------------------
+# Research entries
+# -------------------------------------------------
+async def find_research_entries(query=None, limit=10, skip=0, sort=("created_at", -1)):
+    cursor = collection("research_entries").find(query or {}).sort(*sort).skip(skip).limit(limit)
+    return [_serialize(doc) async for doc in cursor]
+
+
+async def insert_research_entry(entry):
+    result = await collection("research_entries").insert_one(dict(entry))
+    return str(result.inserted_id)
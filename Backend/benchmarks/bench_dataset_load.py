@@ -0,0 +1,72 @@
+"""
+bench_dataset_load.py
+Load time of the ./datas workbooks: pd.read_excel (what the loader modules
+did at import) vs dataset_cache.load_dataset on a cold and a warm cache.
+Each measurement runs in a fresh interpreter, as a module import would.
+Run from the Backend folder:
+
+    python benchmarks/bench_dataset_load.py --repeat 5
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import sys, time
+started = time.perf_counter()
+import pandas as pd
+from dataset_cache import load_dataset
+mode, paths = sys.argv[1], sys.argv[2:]
+loaded = time.perf_counter()
+for path in paths:
+    df = pd.read_excel(path) if mode == "excel" else load_dataset(path)
+print(loaded - started, time.perf_counter() - loaded)
+"""
+
+
+def measure(mode, paths, cache_dir):
+    env = dict(os.environ, DATASET_CACHE_DIR=cache_dir)
+    out = subprocess.run(
+        [sys.executable, "-c", WORKER, mode, *paths],
+        capture_output=True, text=True, cwd=BACKEND_DIR, env=env, check=True,
+    )
+    imports_s, load_s = map(float, out.stdout.split()[-2:])
+    return imports_s, load_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", nargs="+", default=sorted(glob.glob(os.path.join(BACKEND_DIR, "datas", "*.xlsx"))))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="dataset-cache-")
+    try:
+        rows = []
+        for mode in ("excel", "cold", "warm"):
+            loads = []
+            for _ in range(args.repeat):
+                if mode == "cold":
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                imports_s, load_s = measure("excel" if mode == "excel" else "cache", args.files, cache_dir)
+                loads.append(load_s)
+            loads.sort()
+            rows.append((mode, imports_s, loads[len(loads) // 2]))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{len(args.files)} workbook(s): {', '.join(os.path.basename(f) for f in args.files)}\n")
+    print(f"{'mode':>8}  {'imports_s':>10}  {'load_ms':>10}")
+    for mode, imports_s, load_s in rows:
+        print(f"{mode:>8}  {imports_s:>10.3f}  {load_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
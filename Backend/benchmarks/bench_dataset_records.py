@@ -0,0 +1,89 @@
+"""
+bench_dataset_records.py
+DataFrame -> Documents / records: the old per-row DataFrame.iterrows loops
+vs the column-wise conversion in dataset_records.py, on a synthetic dataset.
+Also checks that both produce the same output. Run from the Backend folder:
+
+    python benchmarks/bench_dataset_records.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from dataset_records import DEFAULT_PROJECT_FIELDS, dataframe_to_documents, dataframe_to_records  # noqa: E402
+
+
+def synthetic_dataset(rows):
+    rng = np.random.default_rng(0)
+    ids = np.arange(rows)
+    return pd.DataFrame({
+        "Title": [f"Project {i}: deep learning for topic {i % 97}" for i in ids],
+        "Abstract": [f"This study investigates method {i % 13} on dataset {i % 31}. " * 4 for i in ids],
+        "Year": rng.integers(2000, 2025, size=rows),
+        "Author": [f"Author {i % 1000}" for i in ids],
+    })
+
+
+def iterrows_documents(df):
+    documents = []
+    for idx, row in df.iterrows():
+        text = f"""
+Title: {row['Title']}
+Abstract: {row['Abstract']}
+Year: {row['Year']}
+Author: {row['Author']}
+"""
+        metadata = {
+            "Title": row['Title'],
+            "Abstract": row['Abstract'],
+            "Year": row['Year'],
+            "Author": row['Author']
+        }
+        documents.append(Document(page_content=text.strip(), metadata=metadata))
+    return documents
+
+
+def iterrows_records(df):
+    return [
+        {"title": row["Title"], "authors": row["Author"], "description": row["Abstract"], "year": row["Year"]}
+        for idx, row in df.iterrows()
+    ]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    df = synthetic_dataset(args.rows)
+    print(f"{args.rows} rows\n")
+    print(f"{'conversion':>12}  {'iterrows_s':>10}  {'columnar_s':>10}  {'speedup':>8}  {'same':>5}")
+
+    old, old_s = timed(iterrows_documents, df)
+    new, new_s = timed(dataframe_to_documents, df)
+    same = [d.page_content for d in old] == [d.page_content for d in new] and \
+        [d.metadata for d in old] == [d.metadata for d in new]
+    print(f"{'documents':>12}  {old_s:>10.3f}  {new_s:>10.3f}  {old_s / new_s:>7.1f}x  {str(same):>5}")
+
+    old, old_s = timed(iterrows_records, df)
+    new, new_s = timed(dataframe_to_records, df, DEFAULT_PROJECT_FIELDS)
+    print(f"{'records':>12}  {old_s:>10.3f}  {new_s:>10.3f}  {old_s / new_s:>7.1f}x  {str(old == new):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+bench_query_batching.py
+Query-embedding throughput and latency with and without micro-batching, for
+a number of concurrent searchers. Uses the real search model (no cache), so
+run it on the machine that serves search. From the Backend folder:
+
+    python benchmarks/bench_query_batching.py --clients 1 4 16 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from embedding_models import EMBEDDING_MODEL_NAME, parse_model_spec, quantize_encoder  # noqa: E402
+from query_batcher import QUERY_BATCH_MAX, QUERY_BATCH_WAIT_MS, MicroBatchEmbeddings  # noqa: E402
+
+
+def load_model(model_spec):
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    model_name, quantize = parse_model_spec(model_spec)
+    embeddings = HuggingFaceEmbeddings(model_name=model_name)
+    if quantize:
+        quantize_encoder(embeddings.client)
+    return embeddings
+
+
+def run(embeddings, clients, queries):
+    # Distinct texts so nothing could be served from a cache
+    texts = [f"machine learning for crop disease detection {i}" for i in range(queries)]
+    latencies = []
+
+    def one(text):
+        started = time.perf_counter()
+        embeddings.embed_query(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(one, texts))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return queries / elapsed, latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-batch", type=int, default=QUERY_BATCH_MAX)
+    parser.add_argument("--wait-ms", type=float, default=QUERY_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    base = load_model(args.model)
+    base.embed_query("warm up")
+    batched = MicroBatchEmbeddings(base, max_batch=args.max_batch, max_wait_ms=args.wait_ms)
+
+    print(f"{args.model}, {args.queries} queries, max_batch={args.max_batch}, wait={args.wait_ms}ms\n")
+    print(f"{'clients':>8}  {'mode':>8}  {'qps':>8}  {'p50_ms':>8}  {'p99_ms':>8}")
+    for clients in args.clients:
+        for mode, embeddings in (("single", base), ("batched", batched)):
+            qps, p50, p99 = run(embeddings, clients, args.queries)
+            print(f"{clients:>8}  {mode:>8}  {qps:>8.1f}  {p50:>8.2f}  {p99:>8.2f}")
+    print(f"\nbatcher: {batched.stats()}")
+
+
+if __name__ == "__main__":
+    main()
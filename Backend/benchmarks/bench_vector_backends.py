@@ -0,0 +1,134 @@
+"""
+bench_vector_backends.py
+Compares the past-research vector store backends (Chroma vs the NumPy
+brute-force store in float32 and int8) on import time, build time, query
+latency and resident memory, using synthetic normalised vectors.
+
+Each backend runs in its own subprocess so RSS numbers do not bleed into
+each other. Run from the Backend folder:
+
+    python benchmarks/bench_vector_backends.py --docs 50000 --queries 500
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+BACKENDS = ["chroma", "numpy", "numpy-int8"]
+INSERT_BATCH = 5000
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux), falls back to peak RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _NoEmbeddings:
+    """Benchmarks search by vector, so the text embedder is never called"""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def run_backend(backend, docs, dim, queries, k):
+    import numpy as np
+
+    baseline_rss = rss_mb()
+    started = time.perf_counter()
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+
+        store = Chroma(collection_name="bench_backends", embedding_function=_NoEmbeddings())
+    else:
+        from numpy_index import NumpyVectorStore
+
+        store = NumpyVectorStore(_NoEmbeddings(), quantize=(backend == "numpy-int8"))
+    import_s = time.perf_counter() - started
+    from embedding_pipeline import write_vectors
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((docs, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+    data_rss = rss_mb()
+
+    started = time.perf_counter()
+    for start in range(0, docs, INSERT_BATCH):
+        end = min(start + INSERT_BATCH, docs)
+        write_vectors(
+            store,
+            ids=[str(i) for i in range(start, end)],
+            vectors=vectors[start:end].tolist(),
+            metadatas=[{"title": f"Paper {i}", "year": 2000 + i % 25} for i in range(start, end)],
+            texts=[f"Paper {i}" for i in range(start, end)],
+        )
+    build_s = time.perf_counter() - started
+    del vectors
+
+    latencies = []
+    for query in query_vectors:
+        started = time.perf_counter()
+        store.similarity_search_by_vector(query.tolist(), k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    return {
+        "backend": backend,
+        "import_s": round(import_s, 3),
+        "build_s": round(build_s, 2),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+        "index_rss_mb": round(rss_mb() - data_rss, 1),
+        "total_rss_mb": round(rss_mb() - baseline_rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.docs, args.dim, args.queries, args.k)))
+        return
+
+    print(f"{args.docs} docs x {args.dim} dims, {args.queries} queries, k={args.k}\n")
+    header = ["backend", "import_s", "build_s", "p50_ms", "p99_ms", "index_rss_mb", "total_rss_mb"]
+    print("  ".join(f"{h:>12}" for h in header))
+    for backend in args.backends:
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--docs", str(args.docs),
+             "--dim", str(args.dim), "--queries", str(args.queries), "-k", str(args.k)],
+            capture_output=True, text=True, cwd=BACKEND_DIR,
+        )
+        if out.returncode != 0:
+            print(f"{backend:>12}  failed: {out.stderr.strip().splitlines()[-1] if out.stderr else out.returncode}")
+            continue
+        row = json.loads(out.stdout.strip().splitlines()[-1])
+        print("  ".join(f"{row[h]:>12}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
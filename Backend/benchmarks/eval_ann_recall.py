@@ -0,0 +1,118 @@
+"""
+eval_ann_recall.py
+Measures recall@k and latency of the HNSW index against exact search on the
+real past-research embeddings, for a sweep of ef_search values.
+
+Vectors are read from an already-built index (Chroma or the numpy backend),
+so nothing is re-embedded. Queries are either real query strings from a file
+(one per line, embedded with the search model) or a held-out sample of the
+corpus vectors. Run from the Backend folder:
+
+    python benchmarks/eval_ann_recall.py --source chroma --collection researchprojects_database
+    python benchmarks/eval_ann_recall.py --queries-file queries.txt --ef 16 32 64 128 256
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from hnsw_index import HnswVectorStore  # noqa: E402
+from numpy_index import _normalize  # noqa: E402
+from past_index import open_vectorstore, read_active_model  # noqa: E402
+
+
+def load_corpus(source, collection, model_spec=None):
+    """Return (ids, float32 matrix) from a persisted index"""
+    if source == "numpy":
+        store = open_vectorstore(collection, None, backend="numpy", model_spec=model_spec)
+        ids = store.get()["ids"]
+        return ids, np.asarray(store._matrix[:len(ids)], dtype=np.float32)
+
+    store = open_vectorstore(collection, None, backend="chroma", model_spec=model_spec)
+    data = store.get(include=["embeddings"])
+    return data["ids"], np.asarray(data["embeddings"], dtype=np.float32)
+
+
+def load_queries(path, model_spec):
+    from embedding_models import get_embeddings
+
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    model = get_embeddings(model_spec)
+    return np.asarray(model.embed_documents(queries), dtype=np.float32)
+
+
+def exact_top_k(matrix, queries, k):
+    scores = queries @ matrix.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["chroma", "numpy"], default="chroma")
+    parser.add_argument("--collection", default="researchprojects_database")
+    parser.add_argument("--model", help="model spec whose index to evaluate (default: the active one)")
+    parser.add_argument("--queries-file")
+    parser.add_argument("--sample", type=int, default=200, help="held-out corpus vectors used as queries")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    args = parser.parse_args()
+
+    model_spec = args.model or read_active_model()
+    ids, matrix = load_corpus(args.source, args.collection, model_spec)
+    matrix = _normalize(matrix)
+
+    if args.queries_file:
+        queries = _normalize(load_queries(args.queries_file, model_spec))
+    else:
+        # Hold the sampled vectors out of the index so they are not their own neighbour
+        rng = np.random.default_rng(0)
+        held_out = rng.choice(len(ids), size=min(args.sample, len(ids) // 10 or 1), replace=False)
+        queries = matrix[held_out]
+        keep = np.ones(len(ids), dtype=bool)
+        keep[held_out] = False
+        matrix = matrix[keep]
+        ids = [doc_id for doc_id, kept in zip(ids, keep) if kept]
+
+    k = min(args.k, len(ids))
+    print(f"{len(ids)} vectors x {matrix.shape[1]} dims, {len(queries)} queries, k={k}")
+
+    started = time.perf_counter()
+    truth = exact_top_k(matrix, queries, k)
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    store = HnswVectorStore(None, m=args.m, ef_construction=args.ef_construction)
+    started = time.perf_counter()
+    store.upsert_embeddings(
+        [str(i) for i in range(len(ids))], matrix, metadatas=[{"row": i} for i in range(len(ids))]
+    )
+    print(f"HNSW build (M={args.m}, ef_construction={args.ef_construction}): {time.perf_counter() - started:.1f}s")
+    print(f"exact search: {exact_ms:.3f} ms/query\n")
+
+    print(f"{'ef':>6}  {'recall@' + str(k):>10}  {'mean_ms':>8}  {'p99_ms':>8}")
+    for ef in args.ef:
+        store.set_ef(ef)
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            results = store.similarity_search_by_vector(query, k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(expected & {doc.metadata["row"] for doc in results})
+        latencies.sort()
+        recall = hits / (k * len(queries))
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{ef:>6}  {recall:>10.4f}  {np.mean(latencies):>8.3f}  {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
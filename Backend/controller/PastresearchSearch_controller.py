@@ -1,39 +1,61 @@
+import threading
+
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.schema import Document
-import pandas as pd
+from dataset_cache import load_dataset
+from dataset_records import dataframe_to_documents
+from embedding_models import get_embeddings
+from embedding_pipeline import EmbeddingPipeline
+from search_cache import (
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL_S,
+    TTLCache,
+    normalize_query,
+)
 
 # Load dataset
-df = pd.read_excel("./datas/sample_research_dataset_detailed.xlsx")
+df = load_dataset("./datas/sample_research_dataset_detailed.xlsx")
 df.fillna("N/A", inplace=True)
 
-# Create documents
-documents = []
-for idx, row in df.iterrows():
-    text = f"""
-Title: {row['Title']}
-Abstract: {row['Abstract']}
-Year: {row['Year']}
-Author: {row['Author']}
-"""
-    metadata = {
-        "Title": row['Title'],
-        "Abstract": row['Abstract'],
-        "Year": row['Year'],
-        "Author": row['Author']
-    }
-    documents.append(Document(page_content=text.strip(), metadata=metadata))
-
-# Setup embeddings + Chroma
-embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
-vectorstore = Chroma.from_documents(
-    documents=documents,
-    embedding=embeddings_model,
-    collection_name="projects_database"
-)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+# Create documents (column-wise, see dataset_records.py)
+documents = dataframe_to_documents(df)
+
+# Embeddings + Chroma, built by build_indexes() on the first search rather
+# than at import: with EMBED_WORKERS > 1 the pipeline starts "spawn" workers,
+# which re-import the entry script and, through it, this module.
+embeddings_model = None
+retriever = None
+_index_lock = threading.Lock()
+
+
+def build_indexes():
+    global embeddings_model, retriever
+
+    with _index_lock:
+        if retriever is not None:
+            return
+        model = get_embeddings()
+        vectorstore = Chroma(
+            collection_name="projects_database",
+            embedding_function=model,
+        )
+        embedding_pipeline = EmbeddingPipeline(model)
+        try:
+            embedding_pipeline.index_documents(vectorstore, documents, label="projects_database")
+        finally:
+            embedding_pipeline.close()
+        embeddings_model = model
+        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+
+# (normalized query, collection_type, k) -> formatted results
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S)
 
 def search_projects(user_query):
+    cache_key = (normalize_query(user_query), "research", 5)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    build_indexes()
     results = retriever.get_relevant_documents(user_query)
     formatted_results = []
     for doc in results:
@@ -43,4 +65,11 @@ def search_projects(user_query):
             "description": doc.metadata.get("Abstract", ""),
             "year": doc.metadata.get("Year", ""),
         })
+    result_cache.set(cache_key, formatted_results)
     return formatted_results
+
+def get_cache_stats():
+    return {
+        "query_embeddings": embeddings_model.cache.stats() if embeddings_model else None,
+        "results": result_cache.stats(),
+    }
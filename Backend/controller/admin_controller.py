@@ -4,21 +4,126 @@ Controller for the Research Admin Panel
 Handles business logic for user and research management
 """
 
+import base64
+import json
+import os
+import threading
+import time
+
 from bson import ObjectId
 from datetime import datetime
-import pandas as pd
-from mongo import db
+from pymongo.errors import DuplicateKeyError
+from mongo import collection
+from controller.bulk_ingest import IngestError, ingest
+
+# MongoDB Collections (looked up per call, see mongo.py)
+def users_collection():
+    return collection("users")
+
+
+def research_collection():
+    return collection("research_entries")
+
+
+# Sort orders of the admin lists; _id breaks ties so keyset cursors are exact
+# (both are backed by compound indexes, see db_indexes.py)
+USER_SORT = [("name", 1), ("_id", 1)]
+RESEARCH_SORT = [("year", -1), ("_id", -1)]
 
-# MongoDB Collections
-users_collection = db["users"]
-research_collection = db["research_entries"]
+# List totals are cached this long instead of counted on every page turn
+COUNT_CACHE_TTL_S = float(os.getenv("ADMIN_COUNT_CACHE_TTL_S", "30"))
+_count_cache = {}
+_count_lock = threading.Lock()
+
+# ========================
+# PAGINATION HELPERS
+# ========================
+
+def count_cached(collection, filter_query):
+    """Total for a list filter: estimated from collection metadata when unfiltered, else cached"""
+    if not filter_query:
+        return collection.estimated_document_count()
+
+    key = (collection.name, json.dumps(filter_query, sort_keys=True, default=str))
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+    total = collection.count_documents(filter_query)
+    with _count_lock:
+        _count_cache[key] = (total, now + COUNT_CACHE_TTL_S)
+    return total
+
+
+def invalidate_counts(collection):
+    with _count_lock:
+        for key in [k for k in _count_cache if k[0] == collection.name]:
+            del _count_cache[key]
+
+
+def encode_cursor(doc, sort):
+    """Opaque cursor holding the sort key and _id of the last document on a page"""
+    field = sort[0][0]
+    raw = json.dumps({"v": doc.get(field), "id": str(doc["_id"])}, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def keyset_filter(cursor, sort):
+    """Filter matching the documents after `cursor` in `sort` order (sort key, _id)"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        value, last_id = data["v"], ObjectId(data["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    field, direction = sort[0]
+    op = "$gt" if direction == 1 else "$lt"
+    after = [{field: value, "_id": {op: last_id}}]
+    if value is None:
+        # null / missing sort first ascending and last descending
+        if direction == 1:
+            after.append({field: {"$ne": None}})
+        return {"$or": after}
+
+    after.append({field: {op: value}})
+    # Comparisons only match values of the same BSON type: add the type brackets
+    # that come next in sort order (numbers < strings, null/missing lowest)
+    if direction == 1 and isinstance(value, (int, float)):
+        after.append({field: {"$type": "string"}})
+    if direction == -1:
+        if isinstance(value, str):
+            after.append({field: {"$type": "number"}})
+        after.append({field: None})
+    return {"$or": after}
+
+
+def fetch_page(collection, filter_query, sort, page, per_page, cursor=None):
+    """One page of a list plus the cursor for the next; cursor paging skips nothing"""
+    query = filter_query
+    if cursor:
+        keyset = keyset_filter(cursor, sort)
+        query = {"$and": [filter_query, keyset]} if filter_query else keyset
+        skip = 0
+    else:
+        # Page numbers are still accepted for old clients (cost grows with the offset)
+        skip = (page - 1) * per_page
+
+    docs = list(collection.find(query).sort(sort).skip(skip).limit(per_page + 1))
+    has_more = len(docs) > per_page
+    docs = docs[:per_page]
+    next_cursor = encode_cursor(docs[-1], sort) if has_more and docs else None
+
+    for doc in docs:
+        doc['_id'] = str(doc['_id'])
+    return docs, next_cursor
 
 # ========================
 # USER MANAGEMENT
 # ========================
 
-def get_all_users(search_query="", page=1, per_page=5):
-    """Get all users with search and pagination"""
+def get_all_users(search_query="", page=1, per_page=5, cursor=None):
+    """Get all users with search and pagination (page numbers or keyset cursor)"""
     try:
         # Build search filter
         filter_query = {}
@@ -30,21 +135,10 @@ def get_all_users(search_query="", page=1, per_page=5):
                 ]
             }
         
-        # Count total users
-        total_users = users_collection.count_documents(filter_query)
-        
-        # Calculate pagination
-        skip = (page - 1) * per_page
-        
-        # Get users
-        users = list(users_collection.find(filter_query)
-                    .skip(skip)
-                    .limit(per_page)
-                    .sort("name", 1))
+        # Total is cached / estimated, not recounted per page
+        total_users = count_cached(users_collection(), filter_query)
         
-        # Convert ObjectId to string
-        for user in users:
-            user['_id'] = str(user['_id'])
+        users, next_cursor = fetch_page(users_collection(), filter_query, USER_SORT, page, per_page, cursor)
         
         return {
             'success': True,
@@ -52,8 +146,11 @@ def get_all_users(search_query="", page=1, per_page=5):
             'total': total_users,
             'page': page,
             'per_page': per_page,
-            'total_pages': (total_users + per_page - 1) // per_page
+            'total_pages': (total_users + per_page - 1) // per_page,
+            'next_cursor': next_cursor
         }
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -61,7 +158,7 @@ def get_all_users(search_query="", page=1, per_page=5):
 def get_user_by_id(user_id):
     """Get a specific user by ID"""
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = users_collection().find_one({"_id": ObjectId(user_id)})
         if user:
             user['_id'] = str(user['_id'])
             return user
@@ -80,7 +177,7 @@ def create_user(data):
                 return {'success': False, 'error': f'Missing required field: {field}'}
         
         # Check if email already exists
-        existing_user = users_collection.find_one({"email": data['email']})
+        existing_user = users_collection().find_one({"email": data['email']})
         if existing_user:
             return {'success': False, 'error': 'Email already exists'}
         
@@ -94,10 +191,14 @@ def create_user(data):
             'updated_at': datetime.utcnow()
         }
         
-        result = users_collection.insert_one(user_doc)
+        result = users_collection().insert_one(user_doc)
         user_doc['_id'] = str(result.inserted_id)
+        invalidate_counts(users_collection())
         
         return {'success': True, 'user': user_doc, 'message': 'User created successfully'}
+    except DuplicateKeyError:
+        # Unique email index (db_indexes.py) catches concurrent creates the lookup missed
+        return {'success': False, 'error': 'Email already exists'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -106,7 +207,7 @@ def update_user(user_id, data):
     """Update an existing user"""
     try:
         # Check if user exists
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = users_collection().find_one({"_id": ObjectId(user_id)})
         if not user:
             return {'success': False, 'error': 'User not found'}
         
@@ -121,16 +222,18 @@ def update_user(user_id, data):
         update_data['updated_at'] = datetime.utcnow()
         
         # Update in database
-        users_collection.update_one(
+        users_collection().update_one(
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
         
         # Get updated user
-        updated_user = users_collection.find_one({"_id": ObjectId(user_id)})
+        updated_user = users_collection().find_one({"_id": ObjectId(user_id)})
         updated_user['_id'] = str(updated_user['_id'])
         
         return {'success': True, 'user': updated_user, 'message': 'User updated successfully'}
+    except DuplicateKeyError:
+        return {'success': False, 'error': 'Email already exists'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -138,8 +241,9 @@ def update_user(user_id, data):
 def delete_user(user_id):
     """Delete a user"""
     try:
-        result = users_collection.delete_one({"_id": ObjectId(user_id)})
+        result = users_collection().delete_one({"_id": ObjectId(user_id)})
         if result.deleted_count > 0:
+            invalidate_counts(users_collection())
             return {'success': True, 'message': 'User deleted successfully'}
         return {'success': False, 'error': 'User not found'}
     except Exception as e:
@@ -150,24 +254,14 @@ def delete_user(user_id):
 # RESEARCH MANAGEMENT
 # =============================
 
-def get_all_research_entries(page=1, per_page=10):
-    """Get all research entries with pagination"""
+def get_all_research_entries(page=1, per_page=10, cursor=None):
+    """Get all research entries with pagination (page numbers or keyset cursor)"""
     try:
-        # Count total entries
-        total_entries = research_collection.count_documents({})
-        
-        # Calculate pagination
-        skip = (page - 1) * per_page
-        
-        # Get entries
-        entries = list(research_collection.find()
-                      .skip(skip)
-                      .limit(per_page)
-                      .sort("year", -1))  # Sort by year, newest first
+        # Estimated from collection metadata, not recounted per page
+        total_entries = count_cached(research_collection(), {})
         
-        # Convert ObjectId to string
-        for entry in entries:
-            entry['_id'] = str(entry['_id'])
+        # Sort by year, newest first
+        entries, next_cursor = fetch_page(research_collection(), {}, RESEARCH_SORT, page, per_page, cursor)
         
         return {
             'success': True,
@@ -175,8 +269,11 @@ def get_all_research_entries(page=1, per_page=10):
             'total': total_entries,
             'page': page,
             'per_page': per_page,
-            'total_pages': (total_entries + per_page - 1) // per_page
+            'total_pages': (total_entries + per_page - 1) // per_page,
+            'next_cursor': next_cursor
         }
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -184,7 +281,7 @@ def get_all_research_entries(page=1, per_page=10):
 def get_research_entry_by_id(research_id):
     """Get a specific research entry by ID"""
     try:
-        entry = research_collection.find_one({"_id": ObjectId(research_id)})
+        entry = research_collection().find_one({"_id": ObjectId(research_id)})
         if entry:
             entry['_id'] = str(entry['_id'])
             return entry
@@ -213,8 +310,9 @@ def create_research_entry(data):
             'updated_at': datetime.utcnow()
         }
         
-        result = research_collection.insert_one(entry_doc)
+        result = research_collection().insert_one(entry_doc)
         entry_doc['_id'] = str(result.inserted_id)
+        invalidate_counts(research_collection())
         
         return {'success': True, 'entry': entry_doc, 'message': 'Research entry created successfully'}
     except Exception as e:
@@ -225,7 +323,7 @@ def update_research_entry(research_id, data):
     """Update an existing research entry"""
     try:
         # Check if entry exists
-        entry = research_collection.find_one({"_id": ObjectId(research_id)})
+        entry = research_collection().find_one({"_id": ObjectId(research_id)})
         if not entry:
             return {'success': False, 'error': 'Research entry not found'}
         
@@ -240,13 +338,13 @@ def update_research_entry(research_id, data):
         update_data['updated_at'] = datetime.utcnow()
         
         # Update in database
-        research_collection.update_one(
+        research_collection().update_one(
             {"_id": ObjectId(research_id)},
             {"$set": update_data}
         )
         
         # Get updated entry
-        updated_entry = research_collection.find_one({"_id": ObjectId(research_id)})
+        updated_entry = research_collection().find_one({"_id": ObjectId(research_id)})
         updated_entry['_id'] = str(updated_entry['_id'])
         
         return {'success': True, 'entry': updated_entry, 'message': 'Research entry updated successfully'}
@@ -257,57 +355,48 @@ def update_research_entry(research_id, data):
 def delete_research_entry(research_id):
     """Delete a research entry"""
     try:
-        result = research_collection.delete_one({"_id": ObjectId(research_id)})
+        result = research_collection().delete_one({"_id": ObjectId(research_id)})
         if result.deleted_count > 0:
+            invalidate_counts(research_collection())
             return {'success': True, 'message': 'Research entry deleted successfully'}
         return {'success': False, 'error': 'Research entry not found'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
-def bulk_upload_research(file):
-    """Bulk upload research entries from Excel file"""
+def bulk_upload_research(file, filename=None):
+    """Bulk upload research entries from an Excel / CSV / Parquet file (streamed in batches)"""
     try:
-        # Read Excel file
-        df = pd.read_excel(file)
+        filename = filename or getattr(file, 'filename', '') or ''
         
-        # Validate required columns
-        required_columns = ['Title', 'Abstract', 'Author', 'Year']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        def report(progress):
+            print(f"Bulk upload {filename}: batch {progress['batches']}, {progress['inserted']} inserted, "
+                  f"{progress['updated']} updated, {progress['unchanged']} unchanged, {progress['failed']} failed")
         
-        if missing_columns:
-            return {
-                'success': False, 
-                'error': f'Missing required columns: {", ".join(missing_columns)}'
-            }
+        summary = ingest(file, filename, research_collection(), on_progress=report)
+        if summary['inserted']:
+            invalidate_counts(research_collection())
         
-        # Fill NaN values
-        df.fillna("N/A", inplace=True)
-        
-        # Prepare documents for insertion
-        entries = []
-        for _, row in df.iterrows():
-            entry_doc = {
-                'title': row['Title'],
-                'abstract': row['Abstract'],
-                'author': row['Author'],
-                'year': int(row['Year']) if pd.notna(row['Year']) else 0,
-                'description': row['Abstract'][:200] + '...' if len(row['Abstract']) > 200 else row['Abstract'],
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
-            }
-            entries.append(entry_doc)
-        
-        # Insert into database
-        if entries:
-            result = research_collection.insert_many(entries)
-            return {
-                'success': True,
-                'message': f'Successfully uploaded {len(result.inserted_ids)} research entries',
-                'count': len(result.inserted_ids)
-            }
+        written = summary['inserted'] + summary['updated'] + summary['unchanged']
+        if not written and not summary['failed']:
+            return {'success': False, 'error': 'No valid entries found in the file'}
         
-        return {'success': False, 'error': 'No valid entries found in the file'}
+        return {
+            'success': written > 0,
+            'message': f"Uploaded {summary['inserted']} new, {summary['updated']} updated, "
+                       f"{summary['unchanged']} unchanged research entries"
+                       + (f" ({summary['failed']} rows failed)" if summary['failed'] else ""),
+            'count': summary['inserted'],
+            'inserted': summary['inserted'],
+            'updated': summary['updated'],
+            'unchanged': summary['unchanged'],
+            'failed': summary['failed'],
+            'errors': summary['errors'],
+            'batches': summary['batches'],
+            'seconds': summary['seconds']
+        }
+    except IngestError as e:
+        return {'success': False, 'error': str(e)}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -320,13 +409,13 @@ def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
         # Total users
-        total_users = users_collection.count_documents({})
+        total_users = users_collection().count_documents({})
         
         # Total research entries
-        total_research = research_collection.count_documents({})
+        total_research = research_collection().count_documents({})
         
         # Unsupervised accounts (users without a role or with 'Unsupervised' status)
-        unsupervised = users_collection.count_documents({
+        unsupervised = users_collection().count_documents({
             "$or": [
                 {"role": {"$exists": False}},
                 {"status": "Unsupervised"}
@@ -335,12 +424,12 @@ def get_dashboard_stats():
         
         # Recent users (created in the last 30 days)
         thirty_days_ago = datetime.utcnow().timestamp() - (30 * 24 * 60 * 60)
-        recent_users = users_collection.count_documents({
+        recent_users = users_collection().count_documents({
             "created_at": {"$gte": datetime.fromtimestamp(thirty_days_ago)}
         })
         
         # Recent research entries
-        recent_research = research_collection.count_documents({
+        recent_research = research_collection().count_documents({
             "created_at": {"$gte": datetime.fromtimestamp(thirty_days_ago)}
         })
         
@@ -0,0 +1,302 @@
+"""
+bulk_ingest.py
+Streaming ingestion of research spreadsheets for the admin bulk upload.
+
+Rows are read in chunks (openpyxl read-only mode for .xlsx, chunked readers
+for .csv / .parquet), turned into documents with column-wise pandas
+operations, and written in bounded unordered bulk_write batches, so memory
+stays flat however large the upload is. The exception is legacy .xls: xlrd
+has no streaming mode, so the whole sheet is parsed into memory first and
+only the writes are batched. Rows that cannot be stored are reported with
+their spreadsheet row number instead of failing the upload.
+
+Writes are idempotent: each row is upserted on a dedup key (normalized
+title + author + year) and only rewritten when its content hash changed, so
+re-importing a spreadsheet inserts nothing and rewrites nothing.
+"""
+
+import hashlib
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+REQUIRED_COLUMNS = ['Title', 'Abstract', 'Author', 'Year']
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+# Row errors kept in the response (the failure count is always exact)
+MAX_REPORTED_ERRORS = 100
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.parquet')
+
+
+class IngestError(Exception):
+    """Raised when the file as a whole cannot be ingested (format, missing columns)"""
+
+
+# =============================
+# READERS
+# =============================
+
+def _xlsx_chunks(file, chunk_size, skip_rows=0):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else '' for c in header]
+        rows = sheet.iter_rows(min_row=2 + skip_rows, values_only=True)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _parquet_chunks(file, chunk_size, skip_rows=0):
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(file)
+    # Row groups that lie entirely before skip_rows are never read
+    row_groups, skipped = [], 0
+    for index in range(parquet.num_row_groups):
+        group_rows = parquet.metadata.row_group(index).num_rows
+        if not row_groups and skipped + group_rows <= skip_rows:
+            skipped += group_rows
+        else:
+            row_groups.append(index)
+    if not row_groups:
+        return
+
+    offset = skip_rows - skipped
+    for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=row_groups):
+        if offset:
+            dropped = min(offset, batch.num_rows)
+            batch, offset = batch.slice(dropped), offset - dropped
+            if not batch.num_rows:
+                continue
+        yield batch.to_pandas()
+
+
+def iter_row_chunks(file, filename, chunk_size=BULK_BATCH_SIZE, skip_rows=0):
+    """Yield DataFrames of at most chunk_size spreadsheet rows, after the first skip_rows"""
+    name = filename.lower()
+    if name.endswith('.xlsx'):
+        yield from _xlsx_chunks(file, chunk_size, skip_rows)
+    elif name.endswith('.csv'):
+        yield from pd.read_csv(file, chunksize=chunk_size, skiprows=range(1, skip_rows + 1))
+    elif name.endswith('.parquet'):
+        yield from _parquet_chunks(file, chunk_size, skip_rows)
+    elif name.endswith('.xls'):
+        # Legacy binary workbooks have no streaming reader: the whole sheet is
+        # loaded at once, so memory grows with the file (convert big ones to .xlsx)
+        df = pd.read_excel(file)
+        for start in range(skip_rows, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        raise IngestError(f"Unsupported file type. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+
+# =============================
+# DOCUMENTS
+# =============================
+
+# Fields whose change makes a re-imported row an update
+CONTENT_FIELDS = ['title', 'abstract', 'author', 'year', 'description']
+
+
+def _normalize(values):
+    return values.str.lower().str.split().str.join(' ')
+
+
+def dedup_keys(title, author, year):
+    """Row identity: sha1 of normalized title | author | year (string Series in, list out)"""
+    joined = _normalize(title) + '\x1f' + _normalize(author) + '\x1f' + year.astype(str)
+    return [hashlib.sha1(value.encode('utf-8')).hexdigest() for value in joined]
+
+
+def content_hashes(records):
+    return [
+        hashlib.sha1('\x1f'.join(str(record[field]) for field in CONTENT_FIELDS).encode('utf-8')).hexdigest()
+        for record in records
+    ]
+
+
+def build_documents(df, first_row):
+    """
+    Column-wise conversion of a chunk to research documents.
+    Returns (documents, row numbers, errors); row numbers count the header as row 1.
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise IngestError(f'Missing required columns: {", ".join(missing_columns)}')
+
+    df = df.reset_index(drop=True)
+    rows = np.arange(first_row, first_row + len(df))
+    # openpyxl read-only mode yields blank and cleared rows up to the sheet's
+    # stored size (pd.read_excel dropped them); they are skipped, not failed.
+    # Dropped here rather than in the reader so row numbers and resume offsets stay exact.
+    blank = df.isna().all(axis=1).to_numpy()
+    if blank.any():
+        df, rows = df[~blank].reset_index(drop=True), rows[~blank]
+
+    text = {col: df[col].where(df[col].notna(), "N/A").astype(str).str.strip() for col in ['Title', 'Abstract', 'Author']}
+    year = pd.to_numeric(df['Year'], errors='coerce')
+
+    bad_year = df['Year'].notna() & year.isna()
+    no_title = text['Title'].isin(["", "N/A"])
+    valid = ~(bad_year | no_title)
+
+    errors = [
+        {'row': int(row), 'error': f"Invalid Year: {value!r}"}
+        for row, value in zip(rows[bad_year.to_numpy()], df['Year'][bad_year])
+    ]
+    errors += [{'row': int(row), 'error': 'Missing Title'} for row in rows[(no_title & ~bad_year).to_numpy()]]
+    if not valid.any():
+        return [], [], errors
+
+    abstract = text['Abstract'][valid]
+    description = np.where(abstract.str.len() > 200, abstract.str.slice(0, 200) + '...', abstract)
+    year = year[valid].fillna(0).astype(int)
+
+    records = pd.DataFrame({
+        'title': text['Title'][valid],
+        'abstract': abstract,
+        'author': text['Author'][valid],
+        'year': year,
+        'description': description,
+        'dedup_key': dedup_keys(text['Title'][valid], text['Author'][valid], year),
+    }).to_dict('records')
+    for record, digest in zip(records, content_hashes(records)):
+        record['content_hash'] = digest
+
+    return records, rows[valid.to_numpy()].tolist(), errors
+
+
+# =============================
+# WRITER
+# =============================
+
+def _upsert(document, now):
+    """
+    Upsert on dedup_key as an update pipeline: fields and updated_at only
+    change when the content hash differs, so an identical row is a no-op
+    (matched, not modified)
+    """
+    unchanged = {'$eq': ['$content_hash', document['content_hash']]}
+    fields = {field: {'$cond': [unchanged, f'${field}', {'$literal': document[field]}]} for field in CONTENT_FIELDS}
+    return UpdateOne(
+        {'dedup_key': document['dedup_key']},
+        [{'$set': {
+            **fields,
+            'content_hash': document['content_hash'],
+            'created_at': {'$ifNull': ['$created_at', now]},
+            'updated_at': {'$cond': [unchanged, '$updated_at', now]},
+        }}],
+        upsert=True,
+    )
+
+
+def upsert_batch(collection, documents, rows):
+    """
+    Unordered bulk_write of dedup upserts.
+    Returns ({'inserted', 'updated', 'unchanged'}, row errors).
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    # The same row twice in one batch: keep the last, the earlier copies are unchanged
+    latest = {}
+    for document, row in zip(documents, rows):
+        if document['dedup_key'] in latest:
+            counts['unchanged'] += 1
+        latest[document['dedup_key']] = (document, row)
+    if not latest:
+        return counts, []
+
+    now = datetime.utcnow()
+    batch_rows = [row for _, row in latest.values()]
+    operations = [_upsert(document, now) for document, _ in latest.values()]
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        details, errors = result.bulk_api_result, []
+    except BulkWriteError as e:
+        details = e.details or {}
+        errors = [
+            {'row': batch_rows[err['index']], 'error': err.get('errmsg', 'Write failed')}
+            for err in details.get('writeErrors', [])
+        ]
+
+    counts['inserted'] += details.get('nUpserted', 0)
+    counts['updated'] += details.get('nModified', 0)
+    counts['unchanged'] += details.get('nMatched', 0) - details.get('nModified', 0)
+    return counts, errors
+
+
+def count_rows(path):
+    """Data rows in a stored upload without parsing it (None when unknown)"""
+    name = path.lower()
+    try:
+        if name.endswith('.xlsx'):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True)
+            try:
+                return max(0, (workbook.active.max_row or 1) - 1)
+            finally:
+                workbook.close()
+        if name.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            return pq.ParquetFile(path).metadata.num_rows
+        if name.endswith('.csv'):
+            with open(path, 'rb') as f:
+                return max(0, sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1)
+    except Exception:
+        pass
+    return None
+
+
+def ingest(file, filename, collection, batch_size=BULK_BATCH_SIZE, on_progress=None, resume=None):
+    """
+    Stream `file` into `collection`. `on_progress(summary)` is called after
+    every batch. With `resume` (a summary from an interrupted run) the rows it
+    committed are skipped by the reader, without being parsed, and its
+    counters are carried on.
+    Returns the final summary.
+    """
+    started = time.perf_counter()
+    summary = {'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'batches': 0, 'errors': []}
+    if resume:
+        summary.update({key: resume[key] for key in summary if key in resume})
+        summary['errors'] = list(summary['errors'])
+    next_row = 2 + summary['rows']  # row 1 is the header
+
+    for chunk in iter_row_chunks(file, filename, batch_size, skip_rows=summary['rows']):
+        documents, rows, errors = build_documents(chunk, next_row)
+        next_row += len(chunk)
+
+        counts, write_errors = upsert_batch(collection, documents, rows)
+        errors += write_errors
+
+        summary['rows'] += len(chunk)
+        for key, value in counts.items():
+            summary[key] += value
+        summary['failed'] += len(errors)
+        summary['batches'] += 1
+        room = MAX_REPORTED_ERRORS - len(summary['errors'])
+        summary['errors'] += errors[:max(0, room)]
+        summary['seconds'] = round(time.perf_counter() - started, 2)
+        if on_progress:
+            on_progress(summary)
+
+    summary['seconds'] = round(time.perf_counter() - started, 2)
+    return summary
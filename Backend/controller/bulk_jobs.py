@@ -0,0 +1,261 @@
+"""
+bulk_jobs.py
+Background jobs for admin bulk uploads.
+
+An upload is saved to BULK_UPLOAD_DIR and recorded in the bulk_upload_jobs
+collection, then ingested by a local worker pool (see bulk_ingest.py) while
+the request returns at once with a job id. The job document is updated after
+every committed batch, so the status endpoint can report progress, and a job
+interrupted by a restart resumes from its last committed batch when the
+admin server starts again (resume_jobs).
+
+Each job is owned by one process (owner = host:pid), which refreshes the
+job's heartbeat_at every JOB_HEARTBEAT_S while it is queued or running
+there. On the same beat every process sweeps for orphaned jobs: those whose
+heartbeat is older than JOB_STALE_S, or whose owner is a pid on this host
+that no longer exists (a crash-restart or a reloader restart), and claims
+each with a single find_one_and_update, so with several server processes a
+job is never run twice.
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from controller.bulk_ingest import BULK_BATCH_SIZE, IngestError, count_rows, ingest
+from mongo import collection
+
+BULK_UPLOAD_DIR = os.getenv(
+    "BULK_UPLOAD_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+)
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "1"))
+# Seconds between heartbeats of the jobs a process owns
+JOB_HEARTBEAT_S = float(os.getenv("BULK_JOB_HEARTBEAT_S", "15"))
+# A job whose heartbeat is older than this lost its process and may be taken over
+JOB_STALE_S = float(os.getenv("BULK_JOB_STALE_S", "120"))
+
+ACTIVE_STATUSES = ['queued', 'running']
+
+
+def jobs_collection():
+    return collection("bulk_upload_jobs")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class JobClaimLost(Exception):
+    """Raised when another process took over a job this process was running"""
+
+
+def _owner():
+    # Evaluated per call: pre-fork workers get their own pid after the fork
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass  # exists but belongs to another user, or cannot be checked
+    return True
+
+
+def _dead_local_owners():
+    """Owners of active jobs that were processes on this host and have exited"""
+    host = socket.gethostname()
+    dead = []
+    for owner in jobs_collection().distinct("owner", {"status": {"$in": ACTIVE_STATUSES}}):
+        owner_host, _, pid = str(owner).rpartition(":")
+        if owner_host == host and pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            dead.append(owner)
+    return dead
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_S)
+        try:
+            jobs_collection().update_many(
+                {"owner": _owner(), "status": {"$in": ACTIVE_STATUSES}},
+                {"$set": {"heartbeat_at": datetime.utcnow()}},
+            )
+            _sweep_stale_jobs()
+        except Exception as e:
+            print(f"Bulk upload heartbeat failed: {e}")
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, BULK_WORKERS), thread_name_prefix="bulk-upload")
+            threading.Thread(target=_heartbeat_loop, name="bulk-upload-heartbeat", daemon=True).start()
+        return _pool
+
+
+def _update(job_id, **fields):
+    """Update a job this process owns; False if another process has taken it over"""
+    fields['updated_at'] = datetime.utcnow()
+    result = jobs_collection().update_one({"_id": job_id, "owner": _owner()}, {"$set": fields})
+    return result.matched_count == 1
+
+
+def submit_job(file, filename, target):
+    """
+    Save the upload (a werkzeug FileStorage) and queue it for `target`
+    (a collection name).
+    Returns the new job document.
+    """
+    os.makedirs(BULK_UPLOAD_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    extension = os.path.splitext(filename)[1].lower()
+    path = os.path.join(BULK_UPLOAD_DIR, f"{job_id}{extension}")
+    file.save(path)
+
+    job = {
+        '_id': job_id,
+        'filename': filename,
+        'path': path,
+        'target': target,
+        'status': 'queued',
+        'owner': _owner(),
+        'heartbeat_at': datetime.utcnow(),
+        'batch_size': BULK_BATCH_SIZE,
+        'total_rows': count_rows(path),
+        'rows': 0,
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'failed': 0,
+        'batches': 0,
+        'errors': [],
+        'created_at': datetime.utcnow(),
+        'updated_at': datetime.utcnow(),
+    }
+    jobs_collection().insert_one(job)
+    _get_pool().submit(run_job, job_id)
+    return job
+
+
+def run_job(job_id):
+    # Only a job still queued for this process starts; a stale one is first
+    # re-assigned by resume_jobs
+    now = datetime.utcnow()
+    job = jobs_collection().find_one_and_update(
+        {"_id": job_id, "owner": _owner(), "status": 'queued'},
+        {"$set": {'status': 'running', 'heartbeat_at': now, 'updated_at': now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is None:
+        return
+
+    resumed_from = job['rows']
+    started = time.perf_counter()
+    if not job.get('started_at'):
+        _update(job_id, started_at=now)
+
+    def commit(summary):
+        # Persisted after each batch: this is the resume point after a restart
+        elapsed = time.perf_counter() - started
+        owned = _update(
+            job_id,
+            rows=summary['rows'],
+            inserted=summary['inserted'],
+            updated=summary['updated'],
+            unchanged=summary['unchanged'],
+            failed=summary['failed'],
+            batches=summary['batches'],
+            errors=summary['errors'],
+            rows_per_sec=round((summary['rows'] - resumed_from) / elapsed, 1) if elapsed > 0 else None,
+            heartbeat_at=datetime.utcnow(),
+        )
+        if not owned:
+            raise JobClaimLost(job_id)
+
+    try:
+        with open(job['path'], 'rb') as f:
+            summary = ingest(
+                f, job['filename'], collection(job['target']),
+                batch_size=job['batch_size'], on_progress=commit, resume=job,
+            )
+        _update(job_id, status='done', finished_at=datetime.utcnow(), rows=summary['rows'])
+        print(f"Bulk upload {job_id} done: {summary['inserted']} inserted, {summary['updated']} updated, "
+              f"{summary['unchanged']} unchanged, {summary['failed']} failed")
+    except JobClaimLost:
+        print(f"Bulk upload {job_id} was taken over by another process")
+        return
+    except IngestError as e:
+        _update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+    except Exception as e:
+        _update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+        print(f"Bulk upload {job_id} failed: {e}")
+    else:
+        try:
+            os.remove(job['path'])
+        except OSError:
+            pass
+
+
+def get_job_status(job_id):
+    """Job progress for the status endpoint, or None if unknown"""
+    job = jobs_collection().find_one({"_id": job_id}, {"path": 0})
+    if job is None:
+        return None
+
+    job['job_id'] = job.pop('_id')
+    total, rate = job.get('total_rows'), job.get('rows_per_sec')
+    if job['status'] == 'running' and total and rate:
+        job['eta_seconds'] = round(max(0, total - job['rows']) / rate, 1)
+    if total:
+        job['percent'] = round(100 * min(job['rows'], total) / total, 1)
+    return job
+
+
+def _claim_stale_job(dead_owners):
+    """Atomically take over one queued/running job whose owner stopped heartbeating or exited"""
+    now = datetime.utcnow()
+    return jobs_collection().find_one_and_update(
+        {
+            "status": {"$in": ACTIVE_STATUSES},
+            "$or": [
+                # Also matches jobs recorded before heartbeats existed
+                {"heartbeat_at": {"$not": {"$gte": now - timedelta(seconds=JOB_STALE_S)}}},
+                {"owner": {"$in": dead_owners}},
+            ],
+        },
+        {"$set": {'status': 'queued', 'owner': _owner(), 'heartbeat_at': now, 'updated_at': now}},
+        projection={"_id": 1},
+    )
+
+
+def _sweep_stale_jobs():
+    """Claim and queue every orphaned job; returns their ids"""
+    dead_owners = _dead_local_owners()
+    pending = []
+    while True:
+        job = _claim_stale_job(dead_owners)
+        if job is None:
+            break
+        pending.append(job['_id'])
+        _get_pool().submit(run_job, job['_id'])
+    if pending:
+        print(f"Resuming {len(pending)} bulk upload job(s)")
+    return pending
+
+
+def resume_jobs():
+    """
+    Re-queue orphaned jobs now and keep sweeping for them on every heartbeat
+    (call at startup)
+    """
+    _get_pool()  # starts the heartbeat / sweep thread
+    return _sweep_stale_jobs()
@@ -1,13 +1,184 @@
-from pymongo import MongoClient
-from dotenv import load_dotenv
+"""
+database.py
+Process-wide MongoDB client.
+
+Every module shares one MongoClient (one connection pool, one server
+discovery) per process instead of opening a new client per call. Pool and
+network behaviour can be tuned through the environment; a variable that is
+not set keeps the pymongo default, as the plain MongoClient(url) did:
+
+    MONGO_MAX_POOL_SIZE         connections per server
+    MONGO_MIN_POOL_SIZE         connections kept warm
+    MONGO_MAX_IDLE_MS           idle connections are closed after this
+    MONGO_CONNECT_TIMEOUT_MS    TCP connect timeout
+    MONGO_SOCKET_TIMEOUT_MS     per-operation socket timeout (0 = none)
+    MONGO_SERVER_SELECTION_MS   how long to wait for a usable server
+    MONGO_WAIT_QUEUE_MS         how long to wait for a free pooled connection
+    MONGO_COMPRESSORS           wire compression, e.g. "zstd,snappy,zlib"
+    MONGO_READ_PREFERENCE       primary / primaryPreferred / secondaryPreferred / ...
+
+Fork safety: the client is created with connect=False, so importing modules
+in a pre-fork master (gunicorn preload_app) opens no sockets. If the master
+did use the client, each forked child builds its own on its next get_db().
+That only helps callers that ask get_db() for the database when they need
+it: a handle kept in a module global from import time would still point at
+the master's client, so modules must not keep one.
+"""
+
 import os
+import threading
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, monitoring
 
 load_dotenv()
 
+DB_NAME = "FutureHiveDB"
+
+# Fields of a past research / capstone paper that search and the landing
+# pages read (and that past_index embeds); the rest stays in Mongo
+PAPER_FIELDS = ("title", "abstract", "author", "year", "university")
+PAPER_PROJECTION = {field: 1 for field in PAPER_FIELDS}
+
+# Environment variable -> (MongoClient option, type)
+MONGO_CLIENT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_MS": ("maxIdleTimeMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_WAIT_QUEUE_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),
+}
+
+
+def mongo_url():
+    # MONGO_URI is the name used by the admin panel setup guide
+    return os.getenv("MONGO_URL") or os.getenv("MONGO_URI")
+
+
+def client_options():
+    """MongoClient options set in the environment; the rest keep the driver defaults"""
+    options = {}
+    for env_name, (option, cast) in MONGO_CLIENT_OPTIONS.items():
+        value = os.getenv(env_name)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters collected from pymongo's pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.checkout_failed = 0
+            self.in_use = 0
+
+    def _bump(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump(created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump(closed=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump(checkout_failed=1)
+
+    def connection_checked_out(self, event):
+        self._bump(checked_out=1, in_use=1)
+
+    def connection_checked_in(self, event):
+        self._bump(in_use=-1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "in_use": self.in_use,
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checked_out,
+                "checkout_failures": self.checkout_failed,
+            }
+
+
+pool_stats = PoolStats()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _new_client():
+    return MongoClient(mongo_url(), connect=False, event_listeners=[pool_stats], **client_options())
+
+
+def get_client():
+    """The shared MongoClient of this process, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _new_client()
+    return _client
+
+
 def get_db():
-    mongo_url = os.getenv("MONGO_URL")
+    return get_client()[DB_NAME]
+
+
+def get_pool_stats():
+    stats = pool_stats.snapshot()
+    pool_options = get_client().options.pool_options
+    stats.update({
+        "max_pool_size": pool_options.max_pool_size,
+        "min_pool_size": pool_options.min_pool_size,
+        "pid": os.getpid(),
+    })
+    return stats
+
+
+def _after_fork_in_child():
+    # A client that never connected is safe to inherit; one that did has
+    # sockets and monitor threads that belong to the parent
+    global _client, _client_lock
+    _client_lock = threading.Lock()
+    pool_stats._lock = threading.Lock()  # may have been held by another thread at fork time
+    if _client is not None and pool_stats.created:
+        _client = None
+    pool_stats.reset()
 
-    client = MongoClient(mongo_url)
-    db = client["FutureHiveDB"]
 
-    return db
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,117 @@
+"""
+dataset_cache.py
+Columnar cache for the Excel datasets in ./datas.
+
+Parsing .xlsx through openpyxl is slow and every loader module used to do it
+at import. load_dataset() converts each workbook once to an uncompressed
+Arrow IPC (feather) file in DATASET_CACHE_DIR and memory-maps that file on
+later loads. A cache entry is reused while the workbook's mtime and size are
+unchanged; if they changed but the SHA-1 of its bytes did not (a copy or a
+touch), the entry is kept as well. Without pyarrow it falls back to
+pd.read_excel.
+
+Measure with benchmarks/bench_dataset_load.py.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+DATASET_CACHE_DIR = os.getenv(
+    "DATASET_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datas", ".cache")
+)
+
+_lock = threading.Lock()
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_paths(path):
+    name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    stem = os.path.join(DATASET_CACHE_DIR, f"{os.path.splitext(os.path.basename(path))[0]}-{name}")
+    return stem + ".feather", stem + ".json"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    # Unique temp name: concurrent loaders (pre-fork workers) never share it
+    fd, tmp_path = tempfile.mkstemp(dir=DATASET_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_meta(meta_path, meta):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    _write_atomic(meta_path, write)
+
+
+def _is_fresh(meta, stat, path):
+    if meta is None:
+        return False
+    if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+        return True
+    return meta["sha1"] == file_sha1(path)
+
+
+def load_dataset(path, sheet_name=0):
+    """DataFrame of an Excel workbook, memory-mapped from the columnar cache when possible"""
+    if not PYARROW_AVAILABLE:
+        return pd.read_excel(path, sheet_name=sheet_name)
+
+    data_path, meta_path = _cache_paths(path)
+    stat = os.stat(path)
+
+    with _lock:
+        meta = _read_meta(meta_path)
+        if _is_fresh(meta, stat, path) and meta.get("sheet_name") == sheet_name and os.path.exists(data_path):
+            if meta["mtime_ns"] != stat.st_mtime_ns:
+                meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                _write_meta(meta_path, meta)
+            return feather.read_table(data_path, memory_map=True).to_pandas()
+
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        try:
+            os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+            _write_atomic(data_path, lambda p: feather.write_feather(df, p, compression="uncompressed"))
+            meta = {
+                "source": os.path.abspath(path),
+                "sheet_name": sheet_name,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha1": file_sha1(path),
+            }
+            _write_meta(meta_path, meta)
+        except Exception as e:
+            # e.g. a column mixing numbers and text that Arrow cannot type
+            print(f"Dataset cache skipped for {path}: {e}")
+        return df
@@ -0,0 +1,58 @@
+"""
+dataset_records.py
+Column-wise conversion of the project DataFrames to LangChain Documents and
+JSON-ready records, shared by every dataset loader.
+
+Values are pulled out one column at a time (Series.tolist gives plain Python
+values) and zipped into rows, and the page text is formatted per column with
+vectorized string operations, instead of building a Series per row with
+DataFrame.iterrows. See benchmarks/bench_dataset_records.py.
+"""
+
+from langchain_core.documents import Document
+
+# Columns of the project datasets, in page-text order
+PROJECT_COLUMNS = ["Title", "Abstract", "Year", "Author"]
+
+# API field -> dataset column for the /default responses
+DEFAULT_PROJECT_FIELDS = {
+    "title": "Title",
+    "authors": "Author",
+    "description": "Abstract",
+    "year": "Year",
+}
+
+
+def dataframe_to_records(df, fields, limit=None, **constants):
+    """
+    [{key: row[column] for key, column in fields.items()}, ...] for the first
+    `limit` rows; `constants` are added to every record
+    """
+    if limit is not None:
+        df = df.head(limit)
+    keys = list(fields) + list(constants)
+    columns = [df[column].tolist() for column in fields.values()]
+    columns += [[value] * len(df) for value in constants.values()]
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def dataframe_to_documents(df, columns=PROJECT_COLUMNS):
+    """
+    One Document per row: "Column: value" lines as page content and the
+    columns as metadata. Returns [] (and says why) if a column is missing.
+    """
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        print(f"Missing column(s) in dataset: {', '.join(missing)}")
+        return []
+    if df.empty:
+        return []
+
+    text = None
+    for column in columns:
+        line = f"{column}: " + df[column].astype(str)
+        text = line if text is None else text + "\n" + line
+    texts = text.str.strip().tolist()
+
+    metadatas = dataframe_to_records(df, {column: column for column in columns})
+    return [Document(page_content=page, metadata=metadata) for page, metadata in zip(texts, metadatas)]
@@ -0,0 +1,136 @@
+"""
+db_indexes.py
+Index bootstrap and query-plan check for the admin panel collections.
+
+ensure_indexes() creates (idempotently) the indexes that back the admin
+queries in controller/admin_controller.py and reports any that could not be
+built, e.g. a unique email index over existing duplicate emails.
+check_query_plans() explains the same queries and flags any that still fall
+back to a collection scan (COLLSCAN).
+
+Runs once per process at admin server startup (MONGO_INDEX_BOOTSTRAP=off
+skips it) or by hand:
+
+    python db_indexes.py
+"""
+
+import os
+import threading
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+MONGO_INDEX_BOOTSTRAP = os.getenv("MONGO_INDEX_BOOTSTRAP", "on")
+
+_bootstrap_lock = threading.Lock()
+_bootstrap_result = None
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Sort key + _id tie-breaker for the paginated user list
+        IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_id"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "research_entries": [
+        IndexModel([("year", DESCENDING), ("_id", DESCENDING)], name="year_id"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        # Bulk-upload upsert key; entries created one by one have none
+        IndexModel(
+            [("dedup_key", ASCENDING)], name="dedup_key_unique", unique=True,
+            partialFilterExpression={"dedup_key": {"$exists": True}},
+        ),
+    ],
+}
+
+
+def _query_paths():
+    """(label, collection, filter, sort) for every admin query that must use an index"""
+    return [
+        ("users: list by name", "users", {}, [("name", ASCENDING), ("_id", ASCENDING)]),
+        ("users: search name/email", "users", {
+            "$or": [
+                {"name": {"$regex": "a", "$options": "i"}},
+                {"email": {"$regex": "a", "$options": "i"}},
+            ]
+        }, [("name", ASCENDING), ("_id", ASCENDING)]),
+        ("users: lookup by email", "users", {"email": "someone@example.com"}, None),
+        ("users: created in last 30 days", "users", {"created_at": {"$gte": 0}}, None),
+        ("research: list by year", "research_entries", {}, [("year", DESCENDING), ("_id", DESCENDING)]),
+        ("research: created in last 30 days", "research_entries", {"created_at": {"$gte": 0}}, None),
+        ("research: bulk upsert by dedup key", "research_entries", {"dedup_key": "0" * 40}, None),
+    ]
+
+
+def ensure_indexes(db):
+    """Create missing indexes; returns {collection: [index names]} and prints failures"""
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        created[collection_name] = []
+        for index in indexes:
+            try:
+                created[collection_name] += collection.create_indexes([index])
+            except OperationFailure as e:
+                name = index.document["name"]
+                print(f"⚠️ Could not build index {collection_name}.{name}: {e.details.get('errmsg', e) if e.details else e}")
+    return created
+
+
+def _stages(plan):
+    """All stage names in an explain() plan tree"""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _stages(child)
+    return stages
+
+
+def check_query_plans(db):
+    """Explain the admin query paths; returns the labels that use a collection scan"""
+    scans = []
+    for label, collection_name, query, sort in _query_paths():
+        cursor = db[collection_name].find(query).limit(10)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        except (OperationFailure, KeyError) as e:
+            print(f"⚠️ Could not explain '{label}': {e}")
+            continue
+        if "COLLSCAN" in _stages(plan):
+            scans.append(label)
+            print(f"⚠️ Collection scan on '{label}' ({collection_name} {query})")
+    return scans
+
+
+def bootstrap_indexes(db=None):
+    """Ensure indexes and check query plans, once per process; later calls return the first result"""
+    global _bootstrap_result
+
+    if MONGO_INDEX_BOOTSTRAP == "off":
+        return None
+    with _bootstrap_lock:
+        if _bootstrap_result is not None:
+            return _bootstrap_result
+        if db is None:
+            from database import get_db
+            db = get_db()
+        try:
+            created = ensure_indexes(db)
+            scans = check_query_plans(db)
+        except Exception as e:
+            # Never keep the server from starting over an index problem
+            print(f"⚠️ Index bootstrap failed: {e}")
+            return None
+        print(f"✅ Indexes verified: {created}")
+        if not scans:
+            print("✅ All admin query paths use an index")
+        _bootstrap_result = {"indexes": created, "collection_scans": scans}
+        return _bootstrap_result
+
+
+if __name__ == "__main__":
+    bootstrap_indexes()
@@ -0,0 +1,119 @@
+"""
+embedding_models.py
+Process-wide registry of sentence-transformer embedding models.
+
+Every search module asks the registry for its model instead of constructing
+its own HuggingFaceEmbeddings, so the ~420MB all-mpnet-base-v2 weights are
+loaded once per process no matter how many modules are imported. Models are
+handed out wrapped in CachedEmbeddings (search_cache.py), and query cache
+misses from concurrent searches are encoded together by MicroBatchEmbeddings
+(query_batcher.py).
+
+A model spec is a sentence-transformers name, optionally suffixed with "+int8"
+for a dynamically int8-quantized encoder (Linear layers in qint8, CPU only),
+e.g. "sentence-transformers/all-MiniLM-L6-v2+int8". Changing the served model
+is done with migrate_embeddings.py, never by editing EMBEDDING_MODEL alone.
+
+For pre-fork servers call preload_models() in the master before workers are
+forked (gunicorn.conf.py does this): the weights are then shared between
+workers copy-on-write instead of being loaded again in each one. It loads the
+model of the served index (past_index.read_active_model), which differs from
+EMBEDDING_MODEL once migrate_embeddings.py has switched it.
+"""
+
+import gc
+import os
+import threading
+
+from query_batcher import MicroBatchEmbeddings
+from search_cache import CachedEmbeddings
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+# torch intra-op threads used for encoding; 0 keeps torch's default (all cores)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+_models = {}
+_lock = threading.Lock()
+_threads_configured = False
+
+
+def _configure_threads():
+    global _threads_configured
+    if _threads_configured or EMBEDDING_THREADS <= 0:
+        return
+    import torch
+
+    torch.set_num_threads(EMBEDDING_THREADS)
+    _threads_configured = True
+
+
+def parse_model_spec(model_spec):
+    """"name+int8" -> ("name", True)"""
+    if model_spec.endswith("+int8"):
+        return model_spec[:-len("+int8")], True
+    return model_spec, False
+
+
+def quantize_encoder(sentence_transformer):
+    """Dynamic int8 quantization of the encoder's Linear layers, in place"""
+    import torch
+
+    torch.quantization.quantize_dynamic(
+        sentence_transformer, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+    return sentence_transformer
+
+
+def get_embeddings(model_spec=EMBEDDING_MODEL_NAME):
+    """Return the shared (cached) embeddings object for `model_spec`, loading it once"""
+    model = _models.get(model_spec)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(model_spec)
+        if model is None:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+
+            _configure_threads()
+            model_name, quantize = parse_model_spec(model_spec)
+            embeddings = HuggingFaceEmbeddings(model_name=model_name)
+            if quantize:
+                quantize_encoder(embeddings.client)
+            model = CachedEmbeddings(MicroBatchEmbeddings(embeddings))
+            _models[model_spec] = model
+            print(f"Loaded embedding model: {model_spec}")
+    return model
+
+
+def release_model(model_spec):
+    """Drop a model from the registry (e.g. after the served index moved to another one)"""
+    with _lock:
+        model = _models.pop(model_spec, None)
+    if model is not None:
+        del model
+        # Frozen by preload_models; this process no longer shares it
+        gc.unfreeze()
+        gc.collect()
+        print(f"Released embedding model: {model_spec}")
+
+
+def preload_models(model_specs=None):
+    """
+    Load models before forking workers: by default the served index's model
+    and EMBEDDING_MODEL if it differs. Only the weights are loaded (no
+    inference runs in the parent), and the surviving objects are moved out of
+    the GC's reach so collections in the workers do not un-share their pages.
+    """
+    if model_specs is None:
+        from past_index import read_active_model
+
+        model_specs = list(dict.fromkeys([read_active_model(), EMBEDDING_MODEL_NAME]))
+    for model_spec in model_specs:
+        get_embeddings(model_spec)
+    gc.collect()
+    gc.freeze()
+
+
+def loaded_models():
+    return list(_models)
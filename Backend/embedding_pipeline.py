@@ -0,0 +1,156 @@
+"""
+embedding_pipeline.py
+Batched, CPU-parallel embedding stage used when (re)building the vector indexes.
+
+Documents are consumed from any iterable (a MongoDB cursor, DataFrame rows...)
+in chunks, encoded in fixed-size batches and written straight into the Chroma
+collection with precomputed vectors, so the corpus never has to be held in
+memory as a whole. With EMBED_WORKERS > 1 the batches are spread across a pool
+of worker processes, each holding its own copy of the sentence-transformer.
+Workers are started with "spawn", so the entry script must keep its startup
+code under `if __name__ == "__main__":` (as main.py does) when EMBED_WORKERS > 1.
+"""
+
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from embedding_models import EMBEDDING_MODEL_NAME, parse_model_spec, quantize_encoder
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+EMBED_CHUNK_SIZE = int(os.getenv("EMBED_CHUNK_SIZE", "2000"))
+
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of at most `size` items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# -------------------------------------------------
+# Worker process side
+# -------------------------------------------------
+_worker_model = None
+
+
+def _init_worker(model_spec, threads):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # Split the cores between workers instead of letting each one grab them all
+    torch.set_num_threads(threads)
+    model_name, quantize = parse_model_spec(model_spec)
+    _worker_model = SentenceTransformer(model_name)
+    if quantize:
+        quantize_encoder(_worker_model)
+
+
+def _encode_batch(texts):
+    # Same preprocessing as HuggingFaceEmbeddings.embed_documents
+    texts = [text.replace("\n", " ") for text in texts]
+    return _worker_model.encode(texts, batch_size=len(texts)).tolist()
+
+
+# -------------------------------------------------
+# Pipeline
+# -------------------------------------------------
+def write_vectors(vectorstore, ids, vectors, metadatas, texts):
+    """Upsert precomputed vectors into a Chroma or NumpyVectorStore collection"""
+    if hasattr(vectorstore, "upsert_embeddings"):
+        vectorstore.upsert_embeddings(ids, vectors, metadatas, texts)
+    else:
+        vectorstore._collection.upsert(
+            ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts
+        )
+
+class EmbeddingPipeline:
+    """
+    Encodes documents in batches and upserts them into a vectorstore.
+
+    `embeddings` is the LangChain embeddings object already used by the caller;
+    it does the encoding in-process when workers == 1, so no second copy of the
+    model is loaded. With more workers, `model_name` is loaded once per worker.
+    """
+
+    def __init__(self, embeddings, model_name=EMBEDDING_MODEL_NAME,
+                 batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS,
+                 chunk_size=EMBED_CHUNK_SIZE):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # spawn: forking a process that already initialised torch can deadlock
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, threads),
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def embed_texts(self, texts):
+        """Encode a list of texts, batch by batch, preserving order"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.workers == 1:
+            vectors = []
+            for batch in batches:
+                vectors.extend(self.embeddings.embed_documents(batch))
+            return vectors
+
+        vectors = []
+        for batch_vectors in self._get_pool().map(_encode_batch, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def index_documents(self, vectorstore, documents, label=None):
+        """
+        Stream LangChain documents into `vectorstore`.
+        Documents carrying an "_id" in their metadata are upserted under that id.
+        Returns {"documents", "seconds", "docs_per_sec"}.
+        """
+        if label is None:
+            label = vectorstore.name if hasattr(vectorstore, "name") else vectorstore._collection.name
+        started = time.perf_counter()
+        total = 0
+
+        for chunk in iter_chunks(documents, self.chunk_size):
+            texts = [doc.page_content for doc in chunk]
+            vectors = self.embed_texts(texts)
+            write_vectors(
+                vectorstore,
+                ids=[doc.metadata.get("_id") or str(uuid.uuid4()) for doc in chunk],
+                vectors=vectors,
+                metadatas=[doc.metadata for doc in chunk],
+                texts=texts,
+            )
+            total += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"[{label}] embedded {total} docs ({total / elapsed:.1f} docs/sec)")
+
+        elapsed = time.perf_counter() - started
+        return {
+            "documents": total,
+            "seconds": round(elapsed, 2),
+            "docs_per_sec": round(total / elapsed, 1) if elapsed and total else 0.0,
+        }
@@ -0,0 +1,34 @@
+"""
+gunicorn.conf.py
+Pre-fork deployment of main.py:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The embedding model is loaded once in the master and shared copy-on-write by
+the workers; each worker then reopens the persisted search index in the
+background (Chroma / sqlite handles must not cross a fork). Workers take
+turns on the index write lock (past_index.index_write_lock): the first one
+syncs and persists the index, the others find it up to date and only open
+it. Admin writes handled by one worker reach the others through the index
+change log in Mongo (pastMongo.poll_index_changes).
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def on_starting(server):
+    from embedding_models import preload_models
+
+    preload_models()
+
+
+def post_fork(server, worker):
+    from pastMongo import warm_up
+
+    warm_up(background=True)
@@ -0,0 +1,278 @@
+"""
+hnsw_index.py
+Approximate nearest-neighbour vector store (HNSW graph via hnswlib) for large
+past-research corpora where exact search no longer meets our latency budget.
+
+Recall vs latency is tuned with:
+    PAST_HNSW_M                 graph degree (memory / recall at build time)
+    PAST_HNSW_EF_CONSTRUCTION   build-time beam width
+    PAST_HNSW_EF_SEARCH         query-time beam width (higher = better recall, slower)
+
+Inserts and deletes are incremental (deleted slots are reused), and the graph
+is saved next to its metadata so restarts do not rebuild it. Like
+NumpyVectorStore, the class implements the LangChain VectorStore interface.
+Use benchmarks/eval_ann_recall.py to measure recall@10 against exact search.
+
+Filtered searches compute the allowed labels from columnar metadata arrays
+and pass them to hnswlib as a filter, so the graph walk only returns matching
+papers. Very selective filters skip the graph and score the survivors exactly.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from numpy_index import MetadataColumns, _normalize
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except Exception:
+    HNSWLIB_AVAILABLE = False
+
+HNSW_M = int(os.getenv("PAST_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("PAST_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("PAST_HNSW_EF_SEARCH", "64"))
+HNSW_INITIAL_CAPACITY = 1024
+# Below this many filter matches an exact scan is cheaper and has perfect recall
+HNSW_EXACT_FILTER_MAX = int(os.getenv("PAST_HNSW_EXACT_FILTER_MAX", "2000"))
+
+
+class HnswVectorStore(VectorStore):
+    """Cosine-similarity ANN search over an hnswlib graph"""
+
+    def __init__(self, embedding_function, persist_directory=None, m=HNSW_M,
+                 ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH):
+        if not HNSWLIB_AVAILABLE:
+            raise RuntimeError("hnswlib is not installed; pip install hnswlib or pick another PAST_SEARCH_BACKEND")
+
+        self._embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+        self._index = None
+        self._labels = {}       # document id -> hnsw label
+        self._ids = {}          # hnsw label -> document id
+        self._metadatas = {}    # hnsw label -> metadata
+        self._texts = {}        # hnsw label -> page content
+        self._next_label = 0
+        self._columns = MetadataColumns()   # indexed by hnsw label
+        self._lock = threading.RLock()
+
+        if persist_directory and os.path.exists(self._meta_path):
+            self._load()
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    @property
+    def name(self):
+        return os.path.basename(self.persist_directory) if self.persist_directory else "hnsw"
+
+    def __len__(self):
+        return len(self._labels)
+
+    # -------------------------------------------------
+    # Storage
+    # -------------------------------------------------
+    @property
+    def _meta_path(self):
+        return os.path.join(self.persist_directory, "meta.json")
+
+    @property
+    def _graph_path(self):
+        return os.path.join(self.persist_directory, "graph.bin")
+
+    def _new_index(self, dim, capacity):
+        index = hnswlib.Index(space="cosine", dim=dim)
+        index.init_index(
+            max_elements=capacity,
+            ef_construction=self.ef_construction,
+            M=self.m,
+            allow_replace_deleted=True,
+        )
+        index.set_ef(self.ef_search)
+        return index
+
+    def _ensure_capacity(self, extra, dim):
+        if self._index is None:
+            self._index = self._new_index(dim, max(extra, HNSW_INITIAL_CAPACITY))
+            return
+        needed = self._index.get_current_count() + extra
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+
+    def upsert_embeddings(self, ids, embeddings, metadatas=None, texts=None):
+        """Insert or replace precomputed vectors (used by the embedding pipeline)"""
+        if not ids:
+            return
+        vectors = _normalize(embeddings)
+        metadatas = metadatas or [{} for _ in ids]
+        texts = texts or ["" for _ in ids]
+
+        with self._lock:
+            new_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id not in self._labels]
+            self._ensure_capacity(len(new_ids), vectors.shape[1])
+            for doc_id in new_ids:
+                self._labels[doc_id] = self._next_label
+                self._ids[self._next_label] = doc_id
+                self._next_label += 1
+
+            labels = np.array([self._labels[doc_id] for doc_id in ids], dtype=np.int64)
+            # Existing labels are updated in place; new ones may reuse deleted slots
+            self._index.add_items(vectors, labels, replace_deleted=True)
+            for label, metadata, text in zip(labels.tolist(), metadatas, texts):
+                self._metadatas[label] = dict(metadata or {})
+                self._texts[label] = text
+                self._columns.set(label, self._metadatas[label])
+
+    def update_metadatas(self, ids, metadatas):
+        """Replace the metadata of stored items without touching the graph"""
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                label = self._labels.get(doc_id)
+                if label is not None:
+                    self._metadatas[label] = dict(metadata or {})
+                    self._columns.set(label, self._metadatas[label])
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        ids = list(ids) if ids else [str(self._next_label + i) for i in range(len(texts))]
+        self.upsert_embeddings(ids, self._embedding_function.embed_documents(texts), metadatas, texts)
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        with self._lock:
+            for doc_id in ids or []:
+                label = self._labels.pop(doc_id, None)
+                if label is None:
+                    continue
+                self._index.mark_deleted(label)
+                del self._ids[label]
+                del self._metadatas[label]
+                del self._texts[label]
+        return True
+
+    def get(self, ids=None, include=None):
+        """Chroma-compatible subset of `get`, used for content-hash syncing"""
+        with self._lock:
+            doc_ids = list(self._labels) if ids is None else [i for i in ids if i in self._labels]
+            labels = [self._labels[doc_id] for doc_id in doc_ids]
+            return {
+                "ids": doc_ids,
+                "metadatas": [self._metadatas[label] for label in labels],
+                "documents": [self._texts[label] for label in labels],
+            }
+
+    def set_ef(self, ef_search):
+        """Change the query-time beam width without rebuilding"""
+        with self._lock:
+            self.ef_search = ef_search
+            if self._index is not None:
+                self._index.set_ef(ef_search)
+
+    def persist(self):
+        if not self.persist_directory or self._index is None:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with self._lock:
+            tmp_graph = self._graph_path + ".tmp"
+            self._index.save_index(tmp_graph)
+            os.replace(tmp_graph, self._graph_path)
+
+            tmp_meta = self._meta_path + ".tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({
+                    "dim": self._index.dim,
+                    "m": self.m,
+                    "ef_construction": self.ef_construction,
+                    "labels": self._labels,
+                    "metadatas": {str(label): meta for label, meta in self._metadatas.items()},
+                    "texts": {str(label): text for label, text in self._texts.items()},
+                    "next_label": self._next_label,
+                }, f)
+            os.replace(tmp_meta, self._meta_path)
+
+    def _load(self):
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if not os.path.exists(self._graph_path):
+            return  # nothing saved yet: start empty, the sync re-embeds
+
+        index = hnswlib.Index(space="cosine", dim=meta["dim"])
+        index.load_index(self._graph_path, allow_replace_deleted=True)
+        index.set_ef(self.ef_search)
+
+        self._index = index
+        self._labels = meta["labels"]
+        self._ids = {label: doc_id for doc_id, label in self._labels.items()}
+        self._metadatas = {int(label): value for label, value in meta["metadatas"].items()}
+        self._texts = {int(label): value for label, value in meta["texts"].items()}
+        self._next_label = meta["next_label"]
+        for label, metadata in self._metadatas.items():
+            self._columns.set(label, metadata)
+
+    # -------------------------------------------------
+    # Search
+    # -------------------------------------------------
+    def _allowed_labels(self, filters):
+        mask = self._columns.mask(filters, self._next_label)
+        return [label for label in np.flatnonzero(mask).tolist() if label in self._ids]
+
+    def _exact_search(self, query, labels, k):
+        vectors = _normalize(self._index.get_items(labels))
+        scores = vectors @ query
+        top = np.argsort(-scores)[:k]
+        return [labels[i] for i in top.tolist()], [1.0 - float(scores[i]) for i in top.tolist()]
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None, **kwargs):
+        with self._lock:
+            query = _normalize(embedding)
+            allowed = self._allowed_labels(filter) if filter else None
+            k = min(k, len(self._labels) if allowed is None else len(allowed))
+            if k == 0:
+                return []
+
+            if allowed is not None and len(allowed) <= HNSW_EXACT_FILTER_MAX:
+                labels, distances = self._exact_search(query, allowed, k)
+            else:
+                if k > self.ef_search:
+                    self._index.set_ef(k)
+                allowed_set = set(allowed) if allowed is not None else None
+                labels, distances = self._index.knn_query(
+                    query, k=k, filter=(allowed_set.__contains__ if allowed_set is not None else None)
+                )
+                labels, distances = labels[0].tolist(), distances[0].tolist()
+                if k > self.ef_search:
+                    self._index.set_ef(self.ef_search)
+
+            return [
+                (Document(page_content=self._texts[label], metadata=dict(self._metadatas[label])), 1.0 - float(distance))
+                for label, distance in zip(labels, distances)
+            ]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
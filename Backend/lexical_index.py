@@ -0,0 +1,131 @@
+"""
+lexical_index.py
+In-process BM25 inverted index over title / author / abstract, plus reciprocal
+rank fusion for combining it with dense (embedding) results.
+
+Exact-term queries such as author names, acronyms and years are where dense
+retrieval is weakest and BM25 is strongest. The index is updated per document,
+so it follows the vector index through admin writes, and it needs no model, so
+/past/search can answer from it alone while the embeddings are still warming.
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from past_index import matches_filters
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Title and author terms count more than abstract terms
+FIELD_WEIGHTS = {"title": 2, "author": 2, "abstract": 1, "year": 1}
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def reciprocal_rank_fusion(result_lists, key="_id", k=RRF_K):
+    """
+    Fuse several ranked lists of metadata dicts into one.
+    Each item scores sum(1 / (k + rank)) over the lists it appears in.
+    """
+    scores = defaultdict(float)
+    items = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            item_key = item.get(key)
+            scores[item_key] += 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [items[item_key] for item_key in ranked]
+
+
+class BM25Index:
+    """Okapi BM25 over weighted document fields, keyed by document id"""
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)   # term -> {doc_id: term frequency}
+        self._doc_terms = {}                 # doc_id -> Counter of terms
+        self._doc_lengths = {}               # doc_id -> weighted term count
+        self._metadatas = {}                 # doc_id -> metadata
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _terms(self, metadata):
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(metadata.get(field, "")):
+                terms[token] += weight
+        return terms
+
+    def upsert(self, doc_id, metadata):
+        with self._lock:
+            self.remove(doc_id)
+            terms = self._terms(metadata)
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._metadatas[doc_id] = metadata
+            self._total_length += self._doc_lengths[doc_id]
+
+    def remove(self, doc_id):
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+            self._metadatas.pop(doc_id, None)
+            self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def add_documents(self, documents):
+        """Index LangChain documents by their metadata["_id"]"""
+        for doc in documents:
+            self.upsert(doc.metadata["_id"], doc.metadata)
+
+    def search(self, query, k=10, filters=None):
+        """
+        Return up to k metadata dicts, best BM25 score first.
+        With `filters` (see past_index.parse_filters), postings of papers that
+        do not match are skipped before they are scored.
+        """
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+
+            allowed = {}
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    if filters:
+                        if doc_id not in allowed:
+                            allowed[doc_id] = matches_filters(self._metadatas[doc_id], filters)
+                        if not allowed[doc_id]:
+                            continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(k, scores, key=scores.get)
+            return [self._metadatas[doc_id] for doc_id in top]
@@ -3,13 +3,17 @@ main.py
 Central runner for all Flask modules.
 """
 
-from flask import Flask
+import os
+
+from flask import Flask, jsonify
 from flask_cors import CORS
 
+from database import get_pool_stats
+
 # Import Blueprints from your route modules
 # from pastMongo import project_search_bp as past_bp
 from Admin_Papers import admin
-from pastMongo import past_papers
+from pastMongo import past_papers, warm_up
 from mentors import mentors_bp
 
 
@@ -24,6 +28,19 @@ app.register_blueprint(past_papers, url_prefix="/past")
 app.register_blueprint(mentors_bp, url_prefix="/mentors")
 
 
+@app.route("/db/stats", methods=["GET"])
+def db_stats():
+    return jsonify(get_pool_stats()), 200
+
+
 # Run the main Flask app
 if __name__ == "__main__":
+    # Build the past-research index before accepting traffic.
+    # PAST_WARMUP=background serves immediately (search answers from BM25 until ready),
+    # PAST_WARMUP=off keeps the old lazy behaviour.
+    # With debug=True only the reloader child serves requests, so warm up there.
+    warmup_mode = os.getenv("PAST_WARMUP", "blocking")
+    if warmup_mode != "off" and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_up(background=(warmup_mode == "background"))
+
     app.run(port=5000, debug=True)
\ No newline at end of file
@@ -1,16 +1,18 @@
 from flask import Blueprint, jsonify
 from database import get_db
+from response_cache import cached_json_response
 
 mentors_bp = Blueprint("mentors", __name__)
 
-db = get_db()
-collectionMentors = db["Mentors"]
 
 
 @mentors_bp.route("/default", methods=["GET"])
 def get_default_mentors():
     try:
-        mentors = list(collectionMentors.find({}, {"_id": 0}))  # Fetch all mentors, exclude MongoDB's _id field
-        return jsonify(mentors)
+        # Serialized once per DEFAULT_RESPONSE_TTL_S; clients revalidate with If-None-Match
+        return cached_json_response(
+            ("mentors",),
+            lambda: list(get_db()["Mentors"].find({}, {"_id": 0})),  # Fetch all mentors, exclude MongoDB's _id field
+        )
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
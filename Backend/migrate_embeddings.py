@@ -0,0 +1,49 @@
+"""
+migrate_embeddings.py
+Offline re-embedding of the past-research corpus with a different embedding
+model, followed by an atomic switch of the served index.
+
+The new model's index is built in its own directory next to the live one
+(see past_index.py), so search keeps serving the old index while this runs.
+Once every paper is embedded the active-index pointer is replaced in one
+rename; running servers pick it up on their next searches.
+
+    python migrate_embeddings.py sentence-transformers/all-MiniLM-L6-v2
+    python migrate_embeddings.py "sentence-transformers/all-MiniLM-L6-v2+int8" --no-switch
+    python migrate_embeddings.py sentence-transformers/all-mpnet-base-v2   # roll back
+
+Set EMBED_WORKERS to embed with several processes.
+"""
+
+import argparse
+import time
+
+from past_index import SEARCH_BACKEND, model_index_dir, read_active_model, write_active_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help='sentence-transformers model name, optionally suffixed "+int8"')
+    parser.add_argument("--no-switch", action="store_true", help="build the index but keep serving the current one")
+    args = parser.parse_args()
+
+    import pastMongo
+
+    current = read_active_model()
+    print(f"Serving: {current}  ({SEARCH_BACKEND} backend)")
+    print(f"Building: {args.model} -> {model_index_dir(args.model)}")
+
+    started = time.perf_counter()
+    # Streamed from Mongo; open_indexes prints the per-collection sync counts
+    pastMongo.open_indexes(args.model, *pastMongo.load_documents())
+    print(f"Indexed in {time.perf_counter() - started:.1f}s")
+
+    if args.no_switch:
+        print("Not switching (--no-switch); run again without it to go live")
+        return
+    write_active_model(args.model)
+    print(f"Active index switched: {current} -> {args.model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+mongo.py
+Database access for the admin panel controllers (see database.py).
+
+Collections are looked up per call rather than kept in module globals, so a
+module imported in a pre-fork master never pins the master's client in the
+workers.
+"""
+
+from database import get_db
+
+
+def collection(name):
+    return get_db()[name]
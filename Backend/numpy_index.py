@@ -0,0 +1,306 @@
+"""
+numpy_index.py
+In-memory brute-force vector store backed by a single contiguous NumPy matrix.
+
+Our past-project corpora fit comfortably in RAM, so a top-k cosine search is
+one matrix-vector product plus an argpartition. Vectors are L2-normalised on
+insert and stored either as float32 or, with quantize=True, as int8 codes
+(4x smaller, scores computed block-wise in float32).
+
+The class implements the LangChain VectorStore interface, so `as_retriever()`
+returns the same Documents as the Chroma backend and the rest of pastMongo
+does not care which one is configured (see PAST_SEARCH_BACKEND in past_index.py).
+
+Year and university are also kept as columnar arrays next to the matrix, so a
+filtered search (see past_index.parse_filters) builds a boolean mask first and
+only scores the rows that pass it.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+# Rows scored per block in int8 mode, bounds the temporary float32 copy
+INT8_SCORE_BLOCK = 16384
+INT8_SCALE = 127.0
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class MetadataColumns:
+    """
+    Year and university stored as row-aligned arrays (university as
+    dictionary-encoded ints), so filters become vectorised boolean masks.
+    """
+
+    def __init__(self):
+        self.years = np.zeros(0, dtype=np.int32)
+        self.university_codes = np.zeros(0, dtype=np.int32)
+        self.university_vocab = {}
+
+    def ensure(self, size):
+        if size > len(self.years):
+            size = max(size, len(self.years) * 2, 1024)
+            self.years = np.resize(self.years, size)
+            self.university_codes = np.resize(self.university_codes, size)
+
+    def set(self, row, metadata):
+        self.ensure(row + 1)
+        university = metadata.get("university", "")
+        self.years[row] = metadata.get("year_num", 0)
+        self.university_codes[row] = self.university_vocab.setdefault(university, len(self.university_vocab))
+
+    def move(self, source, target):
+        self.years[target] = self.years[source]
+        self.university_codes[target] = self.university_codes[source]
+
+    def mask(self, filters, count):
+        self.ensure(count)
+        mask = np.ones(count, dtype=bool)
+        if "year_min" in filters:
+            mask &= self.years[:count] >= filters["year_min"]
+        if "year_max" in filters:
+            mask &= self.years[:count] <= filters["year_max"]
+        if "universities" in filters:
+            codes = [self.university_vocab[u] for u in filters["universities"] if u in self.university_vocab]
+            mask &= np.isin(self.university_codes[:count], codes)
+        return mask
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact cosine-similarity search over a contiguous float32 / int8 matrix"""
+
+    def __init__(self, embedding_function, persist_directory=None, quantize=False):
+        self._embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.quantize = quantize
+
+        self._ids = []
+        self._rows = {}
+        self._metadatas = []
+        self._texts = []
+        self._matrix = None
+        # Columnar metadata used for pre-filtering, row-aligned with the matrix
+        self._columns = MetadataColumns()
+        self._lock = threading.RLock()
+
+        if persist_directory and os.path.exists(self._meta_path):
+            self._load()
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    @property
+    def name(self):
+        return os.path.basename(self.persist_directory) if self.persist_directory else "numpy"
+
+    def __len__(self):
+        return len(self._ids)
+
+    # -------------------------------------------------
+    # Storage
+    # -------------------------------------------------
+    @property
+    def _meta_path(self):
+        return os.path.join(self.persist_directory, "meta.json")
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.persist_directory, "vectors.npy")
+
+    def _encode(self, vectors):
+        vectors = _normalize(vectors)
+        if self.quantize:
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors
+
+    def _ensure_capacity(self, needed, dim):
+        dtype = np.int8 if self.quantize else np.float32
+        if self._matrix is None:
+            self._matrix = np.empty((max(needed, 1024), dim), dtype=dtype)
+            return
+        # Grow geometrically; also copies a read-only memory map into RAM on first write
+        if needed > self._matrix.shape[0] or not self._matrix.flags.writeable:
+            grown = np.empty((max(needed, self._matrix.shape[0] * 2), dim), dtype=dtype)
+            grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+            self._matrix = grown
+
+    def upsert_embeddings(self, ids, embeddings, metadatas=None, texts=None):
+        """Insert or replace precomputed vectors (used by the embedding pipeline)"""
+        if not ids:
+            return
+        encoded = self._encode(embeddings)
+        metadatas = metadatas or [{} for _ in ids]
+        texts = texts or ["" for _ in ids]
+
+        with self._lock:
+            new_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id not in self._rows]
+            self._ensure_capacity(len(self._ids) + len(new_ids), encoded.shape[1])
+            for doc_id in new_ids:
+                self._rows[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+                self._metadatas.append(None)
+                self._texts.append(None)
+
+            rows = [self._rows[doc_id] for doc_id in ids]
+            self._matrix[rows] = encoded
+            for row, metadata, text in zip(rows, metadatas, texts):
+                self._metadatas[row] = dict(metadata or {})
+                self._texts[row] = text
+                self._columns.set(row, self._metadatas[row])
+
+    def update_metadatas(self, ids, metadatas):
+        """Replace the metadata of stored rows without touching their vectors"""
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                row = self._rows.get(doc_id)
+                if row is not None:
+                    self._metadatas[row] = dict(metadata or {})
+                    self._columns.set(row, self._metadatas[row])
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        ids = list(ids) if ids else [str(i) for i in range(len(self._ids), len(self._ids) + len(texts))]
+        self.upsert_embeddings(ids, self._embedding_function.embed_documents(texts), metadatas, texts)
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        """Remove rows by id; the last row is moved into the hole to stay contiguous"""
+        with self._lock:
+            for doc_id in ids or []:
+                row = self._rows.pop(doc_id, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    moved_id = self._ids[last]
+                    self._ensure_capacity(len(self._ids), self._matrix.shape[1])
+                    self._matrix[row] = self._matrix[last]
+                    self._columns.move(last, row)
+                    self._ids[row] = moved_id
+                    self._metadatas[row] = self._metadatas[last]
+                    self._texts[row] = self._texts[last]
+                    self._rows[moved_id] = row
+                self._ids.pop()
+                self._metadatas.pop()
+                self._texts.pop()
+        return True
+
+    def get(self, ids=None, include=None):
+        """Chroma-compatible subset of `get`, used for content-hash syncing"""
+        with self._lock:
+            rows = range(len(self._ids)) if ids is None else [self._rows[i] for i in ids if i in self._rows]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+                "documents": [self._texts[row] for row in rows],
+            }
+
+    def persist(self):
+        """Write the matrix and metadata to persist_directory"""
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with self._lock:
+            count = len(self._ids)
+            vectors = self._matrix[:count] if self._matrix is not None else np.empty((0, 0), np.float32)
+            tmp_vectors = self._vectors_path + ".tmp.npy"
+            np.save(tmp_vectors, vectors)
+            os.replace(tmp_vectors, self._vectors_path)
+
+            tmp_meta = self._meta_path + ".tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({
+                    "quantize": self.quantize,
+                    "count": count,
+                    "ids": self._ids,
+                    "metadatas": self._metadatas,
+                    "texts": self._texts,
+                }, f)
+            os.replace(tmp_meta, self._meta_path)
+
+    def _load(self):
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("quantize") != self.quantize or not os.path.exists(self._vectors_path):
+            return  # written by the other mode: start empty, the sync re-embeds
+        matrix = np.load(self._vectors_path, mmap_mode="r")
+        if matrix.shape[0] != meta["count"] or len(meta["ids"]) != meta["count"]:
+            return  # interrupted write: start empty, the sync re-embeds
+
+        # Memory-mapped until the first write copies it into RAM
+        self._matrix = matrix if meta["count"] else None
+        self._ids = meta["ids"]
+        self._metadatas = meta["metadatas"]
+        self._texts = meta["texts"]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        for row, metadata in enumerate(self._metadatas):
+            self._columns.set(row, metadata)
+
+    # -------------------------------------------------
+    # Search
+    # -------------------------------------------------
+    def _scores(self, query_vector, rows=None):
+        """Cosine scores for all rows, or only for `rows` when a filter is applied"""
+        query = _normalize(query_vector)
+        count = len(self._ids) if rows is None else len(rows)
+        if not self.quantize:
+            matrix = self._matrix[:count] if rows is None else self._matrix[rows]
+            return matrix @ query
+
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, INT8_SCORE_BLOCK):
+            end = min(start + INT8_SCORE_BLOCK, count)
+            block = self._matrix[start:end] if rows is None else self._matrix[rows[start:end]]
+            scores[start:end] = block.astype(np.float32) @ query
+        return scores / INT8_SCALE
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None, **kwargs):
+        with self._lock:
+            rows = np.flatnonzero(self._columns.mask(filter, len(self._ids))) if filter else None
+            count = len(self._ids) if rows is None else len(rows)
+            k = min(k, count)
+            if k == 0:
+                return []
+
+            scores = self._scores(embedding, rows)
+            if k < count:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(-scores[top])]
+            matrix_rows = top if rows is None else rows[top]
+
+            return [
+                (Document(page_content=self._texts[row], metadata=dict(self._metadatas[row])), float(score))
+                for row, score in zip(matrix_rows.tolist(), scores[top].tolist())
+            ]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
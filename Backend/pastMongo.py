@@ -1,38 +1,157 @@
+import atexit
+import base64
+import hashlib
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
 import pandas as pd
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from textblob import TextBlob
 from langchain_core.documents import Document
-from flask import request, jsonify, Blueprint
+from flask import request, jsonify, Blueprint, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
 
-from database import get_db
+from database import PAPER_PROJECTION, get_db
+from embedding_models import get_embeddings, release_model
+from embedding_pipeline import EmbeddingPipeline
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from past_index import (
+    METADATA_VERSION,
+    content_hash,
+    delete_documents,
+    filtered_search,
+    filters_key,
+    index_write_lock,
+    open_vectorstore,
+    parse_filters,
+    read_active_model,
+    sync_vectorstore,
+    upsert_documents,
+    write_active_model,
+    year_number,
+)
+from response_cache import cached_json_response, default_responses
+from search_cache import (
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL_S,
+    TTLCache,
+    normalize_query,
+)
+from search_executor import SearchOverloadedError, SearchTimeoutError, search_executor
 
 load_dotenv()
 
 past_papers = Blueprint("past_papers", __name__)
 
 # -------------------------------------------------
-# GLOBAL RETRIEVERS (lazy initialized)
+# GLOBAL INDEXES (lazy initialized)
 # -------------------------------------------------
-retriever1 = None
-retriever2 = None
+research_vectorstore = None
+capstone_vectorstore = None
+research_lexical = None
+capstone_lexical = None
+embeddings_model = None
+# Model spec of the served index (past_index.read_active_model)
+active_model = None
+
+SEARCH_K = 10
+# Depth of the ranked candidate list computed once per query; pages slice it
+MAX_RESULTS = int(os.getenv("PAST_MAX_RESULTS", "100"))
+MAX_PAGE_SIZE = 50
+# How long a pagination cursor stays valid
+CURSOR_TTL_S = int(os.getenv("PAST_CURSOR_TTL_S", "900"))
+
+# hybrid: dense + BM25 fused with reciprocal rank fusion; dense / lexical: one side only
+SEARCH_MODE = os.getenv("PAST_SEARCH_MODE", "hybrid")
+# Candidates taken from each side before fusion
+HYBRID_CANDIDATES = int(os.getenv("PAST_HYBRID_CANDIDATES", "30"))
+
+# (normalized query, collection_type, depth, filters) -> ranked paper metadata.
+# Cleared whenever the index changes so stale hits are never served.
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S)
+
+# Single-flight initialization: one thread builds, the others wait on the lock
+_init_lock = threading.Lock()
+_index_ready = threading.Event()
+
+# How long a /search request waits for a cold index before answering 503
+WARMUP_WAIT_S = float(os.getenv("PAST_WARMUP_WAIT_S", "5"))
+
+# How often searches look at the active-index pointer for a migrated model
+INDEX_SWITCH_CHECK_S = float(os.getenv("PAST_INDEX_SWITCH_CHECK_S", "30"))
+_switch_lock = threading.Lock()
+_last_switch_check = 0.0
+
+# How often searches look for index changes made by other processes
+INDEX_CHANGES_CHECK_S = float(os.getenv("PAST_INDEX_CHANGES_CHECK_S", "2"))
+# Last entry of the index change log applied by this process
+_changes_seen = 0
+_changes_lock = threading.Lock()
+_last_changes_check = 0.0
+# Log entries older than this are dropped by a TTL index; a process that fell
+# further behind than that resyncs its index with Mongo instead of replaying
+INDEX_CHANGES_TTL_S = int(os.getenv("PAST_INDEX_CHANGES_TTL_S", str(7 * 24 * 3600)))
+_change_log_index_ready = False
+# Admin writes rewrite the persisted vector store files at most this often
+INDEX_PERSIST_DELAY_S = float(os.getenv("PAST_INDEX_PERSIST_DELAY_S", "30"))
+_persist_lock = threading.Lock()
+_persist_timer = None
+
+
+class IndexWarmingError(Exception):
+    """Raised when the search index is still being built by another thread"""
 
 # -------------------------------------------------
 # MongoDB loaders (SAFE)
 # -------------------------------------------------
-def load_collections():
-    db = get_db()
-    collection1 = db["Past_Research_projects"]
-    collection2 = db["Capstone_projects"]
+# Documents per cursor round trip while streaming a collection
+LOAD_BATCH_SIZE = int(os.getenv("PAST_LOAD_BATCH_SIZE", "1000"))
+
+COLLECTIONS = {
+    "research": "Past_Research_projects",
+    "capstone": "Capstone_projects",
+}
+
+
+def _collection(collection_type):
+    return get_db()[COLLECTIONS["capstone" if collection_type == "capstone" else "research"]]
+
 
-    research_docs = list(collection1.find())
-    capstone_docs = list(collection2.find())
+def iter_papers(collection_type="research"):
+    """Stream projected papers from Mongo in LOAD_BATCH_SIZE batches"""
+    return _collection(collection_type).find({}, PAPER_PROJECTION, batch_size=LOAD_BATCH_SIZE)
+
+
+def load_collections():
+    research_docs = list(iter_papers("research"))
+    capstone_docs = list(iter_papers("capstone"))
 
     return research_docs, capstone_docs
 
+
+def iter_documents(collection_type="research"):
+    """LangChain documents of a collection, converted one by one as the cursor streams"""
+    for doc in iter_papers(collection_type):
+        yield from convert_to_documents([doc])
+
+
+def load_documents():
+    """
+    (research, capstone) document generators. Each is a single pass over a
+    fresh cursor, so neither the Mongo documents nor the converted documents
+    are ever all in memory at once; call again for another pass.
+    """
+    return iter_documents("research"), iter_documents("capstone")
+
 # -------------------------------------------------
 # Convert MongoDB docs to LangChain Documents
 # -------------------------------------------------
@@ -55,7 +174,10 @@ def convert_to_documents(docs):
                     "author": doc.get("author", ""),
                     "abstract": doc.get("abstract", ""),
                     "year": doc.get("year", ""),
+                    "year_num": year_number(doc.get("year", "")),
                     "university": doc.get("university", "Unknown University"),
+                    "content_hash": content_hash(doc),
+                    "metadata_version": METADATA_VERSION,
                 },
             )
         )
@@ -63,74 +185,610 @@ def convert_to_documents(docs):
 
 # -------------------------------------------------
 # Vectorstore Initialization (LAZY)
+# The index is persisted on disk (see past_index.py); on startup it is
+# reopened and only new or changed papers are embedded.
+# The BM25 indexes are built first: they need no model, so search can
+# answer lexically while the embeddings are still warming up.
 # -------------------------------------------------
-def initialize_vectorstores():
-    global retriever1, retriever2
+def open_indexes(model_spec, documents, capstone_documents):
+    """
+    Open the research and capstone vector stores of `model_spec` and sync
+    them with the given documents. Returns (embeddings, research, capstone).
+    """
+    # Shared process-wide model (embedding_models.py), query vectors memoised
+    embeddings = get_embeddings(model_spec)
 
-    if retriever1 is not None and retriever2 is not None:
-        return
+    pipeline = EmbeddingPipeline(embeddings, model_name=model_spec)
+    try:
+        # One process syncs and persists at a time; the others wait, then
+        # find nothing left to embed and only open the persisted index
+        with index_write_lock(model_spec):
+            research = open_vectorstore("researchprojects_database", embeddings, model_spec=model_spec)
+            stats = sync_vectorstore(research, documents, pipeline=pipeline)
+            print(f"Research index synced ({model_spec}): {stats}")
 
-    research_docs, capstone_docs = load_collections()
+            capstone = open_vectorstore("capstoneprojects_database", embeddings, model_spec=model_spec)
+            stats = sync_vectorstore(capstone, capstone_documents, pipeline=pipeline)
+            print(f"Capstone index synced ({model_spec}): {stats}")
+    finally:
+        pipeline.close()
+    return embeddings, research, capstone
 
-    documents = convert_to_documents(research_docs)
-    capstone_documents = convert_to_documents(capstone_docs)
 
-    embeddings_model = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-mpnet-base-v2"
-    )
+def _build_vectorstores():
+    global research_vectorstore, capstone_vectorstore, embeddings_model
+    global research_lexical, capstone_lexical, active_model, _changes_seen
 
-    research_vectorstore = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings_model,
-        collection_name="researchprojects_database"
-    )
-    retriever1 = research_vectorstore.as_retriever(search_kwargs={"k": 10})
+    # Changes logged after this point are replayed on top of the loaded papers
+    generation = current_change_generation()
+
+    # First pass over the collections: BM25 only
+    documents, capstone_documents = load_documents()
+    lexical = BM25Index()
+    lexical.add_documents(documents)
+    research_lexical = lexical
+    lexical = BM25Index()
+    lexical.add_documents(capstone_documents)
+    capstone_lexical = lexical
 
-    capstone_vectorstore = Chroma.from_documents(
-        documents=capstone_documents,
-        embedding=embeddings_model,
-        collection_name="capstoneprojects_database"
+    # Second pass, streamed through the content-hash sync
+    model_spec = read_active_model()
+    embeddings_model, research_vectorstore, capstone_vectorstore = open_indexes(
+        model_spec, *load_documents()
     )
-    retriever2 = capstone_vectorstore.as_retriever(search_kwargs={"k": 10})
+    active_model = model_spec
+    _changes_seen = generation
+    # Record which index is live so a later migration has a baseline
+    if read_active_model(default=None) is None:
+        write_active_model(model_spec)
+    result_cache.clear()
+
+
+def initialize_vectorstores(timeout=None):
+    """
+    Build the indexes exactly once per process.
+    Concurrent callers block on the builder instead of building their own
+    index. Returns False if the index is still warming after `timeout` seconds.
+    If the build fails, the next caller to get the lock retries it.
+    """
+    if _index_ready.is_set():
+        return True
+
+    if not _init_lock.acquire(timeout=-1 if timeout is None else timeout):
+        return False
+    try:
+        if not _index_ready.is_set():
+            _build_vectorstores()
+            _index_ready.set()
+        return True
+    finally:
+        _init_lock.release()
+
+
+def is_index_ready():
+    return _index_ready.is_set()
+
+
+def warm_up(background=False):
+    """
+    Build the index before serving traffic (call from main.py).
+    With background=True the build runs in a daemon thread and /search
+    answers from BM25 alone (or 503 "warming") until it completes.
+    """
+    if not background:
+        initialize_vectorstores()
+        return None
+
+    thread = threading.Thread(target=initialize_vectorstores, name="past-index-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# -------------------------------------------------
+# Index switching
+# migrate_embeddings.py builds a new model's index offline and then flips
+# the active-index pointer. Running processes notice the flip here, catch
+# the new index up with Mongo in a background thread and swap it in; the
+# old index keeps serving until the swap.
+# -------------------------------------------------
+def _switch_index(model_spec):
+    global research_vectorstore, capstone_vectorstore, embeddings_model, active_model, _changes_seen
+
+    if not _switch_lock.acquire(blocking=False):
+        return  # another thread is already switching
+    previous_model = active_model
+    try:
+        generation = current_change_generation()
+        embeddings, research, capstone = open_indexes(model_spec, *load_documents())
+        embeddings_model, research_vectorstore, capstone_vectorstore = embeddings, research, capstone
+        active_model = model_spec
+        # Every change logged since the snapshot, including this process's own
+        # writes to the old stores, is replayed into the new ones
+        _changes_seen = min(_changes_seen, generation)
+        result_cache.clear()
+        print(f"Switched past-research index to {model_spec}")
+    except Exception as e:
+        print(f"Index switch to {model_spec} failed, still serving {active_model}: {e}")
+        return
+    finally:
+        _switch_lock.release()
+    if previous_model and previous_model != model_spec:
+        release_model(previous_model)
+
+
+def check_index_switch():
+    """
+    Apply index changes logged by other processes, and start a background
+    switch if the active-index pointer changed (both rate limited)
+    """
+    global _last_switch_check
+
+    if not _index_ready.is_set():
+        return
+    poll_index_changes()
+
+    now = time.monotonic()
+    if now - _last_switch_check < INDEX_SWITCH_CHECK_S:
+        return
+    _last_switch_check = now
+
+    model_spec = read_active_model(default=active_model)
+    if model_spec != active_model and not _switch_lock.locked():
+        threading.Thread(target=_switch_index, args=(model_spec,), name="past-index-switch", daemon=True).start()
+
+# -------------------------------------------------
+# Incremental index updates (called after admin writes)
+# Searches read straight from the vector and BM25 indexes, so a single
+# upsert/delete is visible to the next search in this process. Each write
+# is also appended to the index change log in Mongo, and the other worker
+# processes replay the log on their next searches (poll_index_changes), so
+# none of them keeps serving the old paper until a restart. If the index has
+# not been built yet there is nothing to apply: the content-hash sync picks
+# the change up on startup.
+#
+# Writes happen under past_index.index_write_lock, which also orders the log:
+# the process that writes the persisted files first replays every earlier
+# change, so what it persists is never behind the log. The numpy and hnsw
+# stores persist by rewriting whole files, so an admin write only updates
+# the in-memory stores and the files are written by flush_index(), at most
+# INDEX_PERSIST_DELAY_S later (and at exit). A write lost in between is
+# re-embedded by the content-hash sync on the next startup.
+# -------------------------------------------------
+def _vectorstore_for(collection_type):
+    return capstone_vectorstore if collection_type == "capstone" else research_vectorstore
+
+
+def _lexical_for(collection_type):
+    return capstone_lexical if collection_type == "capstone" else research_lexical
+
+
+def _object_id(paper_id):
+    return ObjectId(paper_id) if ObjectId.is_valid(paper_id) else paper_id
+
+
+def _change_log():
+    global _change_log_index_ready
+
+    collection = get_db()["past_index_changes"]
+    if not _change_log_index_ready:
+        try:
+            collection.create_index("created_at", expireAfterSeconds=INDEX_CHANGES_TTL_S)
+        except OperationFailure as e:
+            print(f"Could not create the index change log TTL index: {e}")
+        _change_log_index_ready = True
+    return collection
+
+
+def _origin():
+    # Per process, so it is computed after the fork and differs between workers
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def current_change_generation():
+    """Generation of the latest logged index change (0 if none)"""
+    state = get_db()["past_index_state"].find_one({"_id": "changes"})
+    return state["generation"] if state else 0
+
+
+def _log_change(op, collection_type, paper_id):
+    """Append a change to the log (caller holds index_write_lock)"""
+    global _changes_seen
+
+    generation = get_db()["past_index_state"].find_one_and_update(
+        {"_id": "changes"}, {"$inc": {"generation": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )["generation"]
+    _change_log().insert_one({
+        "_id": generation,
+        "op": op,
+        "type": collection_type,
+        "paper_id": str(paper_id),
+        "origin": _origin(),
+        "created_at": datetime.utcnow(),
+    })
+    _changes_seen = max(_changes_seen, generation)
+
+
+def _apply_upsert(documents, collection_type):
+    lexical = _lexical_for(collection_type)
+    if lexical is not None:
+        lexical.add_documents(documents)
+    vectorstore = _vectorstore_for(collection_type)
+    if vectorstore is not None:
+        upsert_documents(vectorstore, documents)
+    return vectorstore
+
+
+def _apply_remove(paper_id, collection_type):
+    lexical = _lexical_for(collection_type)
+    if lexical is not None:
+        lexical.remove(str(paper_id))
+    vectorstore = _vectorstore_for(collection_type)
+    if vectorstore is not None:
+        delete_documents(vectorstore, [str(paper_id)])
+    return vectorstore
+
+
+def _resync_indexes():
+    """Bring the in-memory indexes in line with Mongo (caller holds index_write_lock)"""
+    global research_lexical, capstone_lexical, _changes_seen
+
+    generation = current_change_generation()
+    lexical = {}
+    for collection_type in ("research", "capstone"):
+        lexical[collection_type] = BM25Index()
+        lexical[collection_type].add_documents(iter_documents(collection_type))
+        vectorstore = _vectorstore_for(collection_type)
+        if vectorstore is not None:
+            sync_vectorstore(vectorstore, iter_documents(collection_type))
+    research_lexical, capstone_lexical = lexical["research"], lexical["capstone"]
+    _changes_seen = generation
+
+
+def _replay_changes():
+    """Apply logged changes newer than _changes_seen (caller holds index_write_lock)"""
+    global _changes_seen
+
+    if research_vectorstore is None and capstone_vectorstore is None:
+        # Nothing built yet: the build loads the current state from Mongo
+        _changes_seen = max(_changes_seen, current_change_generation())
+        return 0
+
+    changes = _change_log().find({"_id": {"$gt": _changes_seen}}).sort("_id", 1)
+    first = next(changes, None)
+    if first is None:
+        return 0
+    if first["_id"] > _changes_seen + 1:
+        # Entries this process has not applied already expired from the log
+        print("Past-research index change log was trimmed past this process, resyncing with Mongo")
+        _resync_indexes()
+        return 1
+
+    # This process's own writes advance _changes_seen as they are logged, so
+    # they only show up here after a build or switch rewound it to its
+    # snapshot; then they may have gone to the old stores and are replayed too
+    applied = 0
+    for change in itertools.chain([first], changes):
+        paper_id = change["paper_id"]
+        doc = None
+        if change["op"] == "upsert":
+            doc = _collection(change["type"]).find_one({"_id": _object_id(paper_id)}, PAPER_PROJECTION)
+        if doc is not None:
+            _apply_upsert(convert_to_documents([doc]), change["type"])
+        else:
+            # Removed, or deleted again since it was logged
+            _apply_remove(paper_id, change["type"])
+        applied += 1
+        _changes_seen = change["_id"]
+    return applied
+
+
+def poll_index_changes():
+    """
+    Replay index changes made by other processes since the last poll and drop
+    the caches they affect (rate limited). Before the index is built only the
+    caches are dropped: the build loads the current state from Mongo.
+    """
+    global _last_changes_check, _changes_seen
+
+    now = time.monotonic()
+    if now - _last_changes_check < INDEX_CHANGES_CHECK_S or not _changes_lock.acquire(blocking=False):
+        return
+    _last_changes_check = now
+    try:
+        # Cheap check first; the file lock is only taken when there is work
+        if _change_log().find_one({"_id": {"$gt": _changes_seen}}, {"_id": 1}) is None:
+            return
+        if _index_ready.is_set():
+            with index_write_lock(active_model):
+                _replay_changes()
+        else:
+            _changes_seen = max(_changes_seen, current_change_generation())
+        result_cache.clear()
+        default_responses.invalidate("past")
+    except Exception as e:
+        print(f"Could not apply past-research index changes: {e}")
+    finally:
+        _changes_lock.release()
+
+
+def flush_index():
+    """Persist the in-memory stores if admin writes are pending (debounced by index_paper/remove_paper)"""
+    global _persist_timer
+
+    with _persist_lock:
+        if _persist_timer is None:
+            return
+        _persist_timer.cancel()
+        _persist_timer = None
+    try:
+        with index_write_lock(active_model):
+            # Never persist a view that is behind the log
+            _replay_changes()
+            for vectorstore in (research_vectorstore, capstone_vectorstore):
+                if vectorstore is not None:
+                    vectorstore.persist()
+    except Exception as e:
+        print(f"Could not persist the past-research index: {e}")
+
+
+def _schedule_persist():
+    global _persist_timer
+
+    with _persist_lock:
+        if _persist_timer is None:
+            _persist_timer = threading.Timer(INDEX_PERSIST_DELAY_S, flush_index)
+            _persist_timer.daemon = True
+            _persist_timer.start()
+
+
+atexit.register(flush_index)
+
+
+def index_paper(doc, collection_type="research"):
+    documents = convert_to_documents([doc])
+    with index_write_lock(active_model):
+        _replay_changes()
+        vectorstore = _apply_upsert(documents, collection_type)
+        _log_change("upsert", collection_type, doc.get("_id"))
+    if vectorstore is not None:
+        _schedule_persist()
+    result_cache.clear()
+    default_responses.invalidate("past")
+
+
+def remove_paper(paper_id, collection_type="research"):
+    with index_write_lock(active_model):
+        _replay_changes()
+        vectorstore = _apply_remove(paper_id, collection_type)
+        _log_change("remove", collection_type, paper_id)
+    if vectorstore is not None:
+        _schedule_persist()
+    result_cache.clear()
+    default_responses.invalidate("past")
 
 # -------------------------------------------------
 # Helper Functions
 # -------------------------------------------------
+def format_default_project(doc):
+    return {
+        "title": doc.get("title", ""),
+        "description": doc.get("abstract", ""),
+        "authors": doc.get("author", ""),
+        "year": doc.get("year", "")
+    }
+
+
 def get_default_projects(collection_type="research", limit=10):
-    research_docs, capstone_docs = load_collections()
+    docs = _collection(collection_type).find({}, PAPER_PROJECTION).limit(limit)
+
+    return [format_default_project(doc) for doc in docs]
+
+def format_result(metadata, collection_type):
+    return {
+        "title": metadata.get("title", ""),
+        "authors": metadata.get("author", ""),
+        "description": metadata.get("abstract", ""),
+        "year": metadata.get("year", ""),
+        "type": collection_type,
+        "university": metadata.get("university", "Unknown University")
+    }
+
+
+def _dense_search(user_query, collection_type, k, filters=None):
+    results = filtered_search(_vectorstore_for(collection_type), user_query, k, filters)
+    return [doc.metadata for doc in results]
+
+
+def _lexical_search(user_query, collection_type, k, filters=None):
+    return _lexical_for(collection_type).search(user_query, k=k, filters=filters)
+
+
+def _rank(user_query, collection_type, depth, filters):
+    if SEARCH_MODE == "dense":
+        return _dense_search(user_query, collection_type, depth, filters)
+    if SEARCH_MODE == "lexical":
+        return _lexical_search(user_query, collection_type, depth, filters)
+    candidates = max(HYBRID_CANDIDATES, depth)
+    return reciprocal_rank_fusion([
+        _dense_search(user_query, collection_type, candidates, filters),
+        _lexical_search(user_query, collection_type, candidates, filters),
+    ])[:depth]
+
+
+def rank_candidates(user_query, collection_type="research", filters=None):
+    """
+    Ranked metadata of up to MAX_RESULTS papers for a query, computed once
+    and cached. `filters` (year_min / year_max / universities, see
+    past_index.parse_filters) are applied inside the indexes before scoring,
+    not to the final list.
+    """
+    lexical = _lexical_for(collection_type)
+
+    # Fast path while another thread is still embedding: BM25 answers alone
+    # (not cached, so full hybrid results replace it once the index is ready)
+    if not _index_ready.is_set() and _init_lock.locked() and lexical is not None:
+        return lexical.search(user_query, k=MAX_RESULTS, filters=filters)
 
-    docs = capstone_docs if collection_type == "capstone" else research_docs
+    if not initialize_vectorstores(timeout=WARMUP_WAIT_S):
+        lexical = _lexical_for(collection_type)
+        if lexical is None:
+            raise IndexWarmingError("Search index is warming up, please retry shortly")
+        return lexical.search(user_query, k=MAX_RESULTS, filters=filters)
 
-    return [
-        {
-            "title": doc.get("title", ""),
-            "description": doc.get("abstract", ""),
-            "authors": doc.get("author", ""),
-            "year": doc.get("year", "")
-        }
-        for doc in docs[:limit]
-    ]
+    check_index_switch()
 
-def search_projects(user_query, collection_type="research"):
-    initialize_vectorstores()
+    cache_key = (normalize_query(user_query), collection_type, MAX_RESULTS, filters_key(filters))
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    if collection_type == "capstone":
-        results = retriever2.invoke(user_query)
+    ranked = _rank(user_query, collection_type, MAX_RESULTS, filters)
+    result_cache.set(cache_key, ranked)
+    return ranked
+
+
+def search_candidates(user_query, collection_type="research", filters=None):
+    """Formatted results of rank_candidates"""
+    return [format_result(m, collection_type) for m in rank_candidates(user_query, collection_type, filters)]
+
+
+def search_projects(user_query, collection_type="research", filters=None):
+    """Top SEARCH_K papers for a query"""
+    return search_candidates(user_query, collection_type, filters)[:SEARCH_K]
+
+# -------------------------------------------------
+# Cursor pagination
+# The first page of a query pins its ranked candidate ids in Mongo
+# (past_search_cursors, expiring after CURSOR_TTL_S), and later pages slice
+# that snapshot instead of ranking again, so they never duplicate or skip
+# results when the ranking changes in between (warm-up finishing, an admin
+# write, another worker answering). A cursor is an opaque token holding the
+# snapshot id, the offset into it and a fingerprint of the query it belongs
+# to, so a cursor cannot be replayed against a different query.
+# A snapshot's id is a hash of the query fingerprint and the ranked ids, so
+# repeats of a query against an unchanged index share one snapshot, and this
+# process only writes it again once half of CURSOR_TTL_S has passed (to push
+# its expiry out): a repeated search costs no Mongo write.
+# -------------------------------------------------
+_cursor_index_ready = False
+# Snapshot ids this process pinned less than CURSOR_TTL_S / 2 ago
+_pinned_snapshots = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=CURSOR_TTL_S / 2)
+
+
+def _cursor_collection():
+    global _cursor_index_ready
+
+    collection = get_db()["past_search_cursors"]
+    if not _cursor_index_ready:
+        try:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+        except OperationFailure as e:
+            print(f"Could not create the cursor TTL index: {e}")
+        _cursor_index_ready = True
+    return collection
+
+
+def _query_fingerprint(user_query, collection_type, filters):
+    key = repr((normalize_query(user_query), collection_type, filters_key(filters)))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(fingerprint, snapshot, offset):
+    raw = json.dumps({"f": fingerprint, "s": snapshot, "o": offset}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor, fingerprint):
+    """Cursor -> (snapshot id, offset); raises ValueError"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        snapshot, offset = str(data["s"]), int(data["o"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if data.get("f") != fingerprint or offset < 0:
+        raise ValueError("Cursor does not belong to this query")
+    return snapshot, offset
+
+
+def _pin_candidates(fingerprint, ranked):
+    ids = [metadata["_id"] for metadata in ranked]
+    snapshot = hashlib.sha1("\x1f".join([fingerprint, *ids]).encode("utf-8")).hexdigest()[:24]
+    if _pinned_snapshots.get(snapshot) is None:
+        _cursor_collection().update_one(
+            {"_id": snapshot},
+            {
+                "$setOnInsert": {"ids": ids, "total": len(ids)},
+                "$set": {"expires_at": datetime.utcnow() + timedelta(seconds=CURSOR_TTL_S)},
+            },
+            upsert=True,
+        )
+        _pinned_snapshots.set(snapshot, True)
+    return snapshot
+
+
+def _pinned_page(snapshot, collection_type, offset, page_size):
+    """Return (results, ids consumed, total) for a slice of a pinned snapshot"""
+    pinned = _cursor_collection().find_one(
+        {"_id": snapshot, "expires_at": {"$gt": datetime.utcnow()}},
+        {"ids": {"$slice": [offset, page_size]}, "total": 1},
+    )
+    if pinned is None:
+        raise ValueError("Cursor expired, run the search again")
+
+    ids = pinned["ids"]
+    papers = {
+        str(doc["_id"]): doc
+        for doc in _collection(collection_type).find({"_id": {"$in": [_object_id(i) for i in ids]}}, PAPER_PROJECTION)
+    }
+    # Papers deleted since the first page are left out
+    results = [format_result(papers[paper_id], collection_type) for paper_id in ids if paper_id in papers]
+    return results, len(ids), pinned["total"]
+
+
+def search_page(user_query, collection_type="research", filters=None, page_size=SEARCH_K, cursor=None):
+    """Return (results, next_cursor, total) for one page of a query"""
+    fingerprint = _query_fingerprint(user_query, collection_type, filters)
+
+    if cursor:
+        snapshot, offset = decode_cursor(cursor, fingerprint)
+        page, consumed, total = _pinned_page(snapshot, collection_type, offset, page_size)
     else:
-        results = retriever1.invoke(user_query)
+        ranked = rank_candidates(user_query, collection_type, filters)
+        offset, consumed, total = 0, min(page_size, len(ranked)), len(ranked)
+        page = [format_result(m, collection_type) for m in ranked[:page_size]]
+        snapshot = _pin_candidates(fingerprint, ranked) if consumed < total else None
+
+    next_offset = offset + consumed
+    next_cursor = encode_cursor(fingerprint, snapshot, next_offset) if next_offset < total else None
+    return page, next_cursor, total
 
-    formatted_results = []
-    for doc in results:
-        formatted_results.append({
-            "title": doc.metadata.get("title", ""),
-            "authors": doc.metadata.get("author", ""),
-            "description": doc.metadata.get("abstract", ""),
-            "year": doc.metadata.get("year", ""),
-            "type": collection_type,
-            "university": doc.metadata.get("university", "Unknown University")
-        })
 
-    return formatted_results
+def parse_search_request(data):
+    """Validate a /search body -> (query, collection_type, filters, page_size, cursor)"""
+    data = data or {}
+    query = data.get("query", "")
+    if not query:
+        raise ValueError("No query provided")
+    filters = parse_filters(data.get("filters"))
+    page_size = int(data.get("page_size") or SEARCH_K)
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    return query, data.get("type", "research"), filters, page_size, data.get("cursor")
+
+
+def _ndjson_lines(results, next_cursor, total):
+    for result in results:
+        yield json.dumps(result) + "\n"
+    yield json.dumps({"next_cursor": next_cursor, "total": total}) + "\n"
+
+
+def get_cache_stats():
+    return {
+        "query_embeddings": embeddings_model.cache.stats() if embeddings_model else None,
+        "query_batches": embeddings_model.base.stats() if embeddings_model else None,
+        "results": result_cache.stats(),
+        "default_responses": default_responses.stats(),
+    }
 
 # -------------------------------------------------
 # Flask Routes
@@ -138,23 +796,51 @@ def search_projects(user_query, collection_type="research"):
 @past_papers.route('/default', methods=['GET'])
 def default_pastpapers():
     try:
-        collection_type = request.args.get('type', 'research')
-        results = get_default_projects(collection_type=collection_type, limit=10)
-        return jsonify({"results": results}), 200
+        # Only two cacheable answers, whatever ?type= a client sends
+        collection_type = "capstone" if request.args.get('type') == "capstone" else "research"
+        # Drops the cached bodies when another worker logged an admin write
+        poll_index_changes()
+        return cached_json_response(
+            ("past", collection_type),
+            lambda: {"results": get_default_projects(collection_type=collection_type, limit=10)},
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @past_papers.route('/search', methods=['POST'])
 def search_api():
     try:
-        data = request.get_json()
-        query = data.get("query", "")
-        collection_type = data.get("type", "research")
+        data = request.get_json() or {}
 
-        if not query:
-            return jsonify({"error": "No query provided"}), 400
+        try:
+            query, collection_type, filters, page_size, cursor = parse_search_request(data)
+            # Encoding and index lookups run on the bounded search pool
+            results, next_cursor, total = search_executor.run(
+                search_page, query, collection_type, filters, page_size, cursor
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # NDJSON: one result per line, then a trailer with the cursor. The page is
+        # ranked before the first line is written (fusion needs both candidate
+        # lists), so this is a line-delimited format, not a lower-latency one.
+        if data.get("stream") or "application/x-ndjson" in request.headers.get("Accept", ""):
+            return Response(_ndjson_lines(results, next_cursor, total), mimetype="application/x-ndjson")
 
-        results = search_projects(query, collection_type)
-        return jsonify({"results": results}), 200
+        return jsonify({"results": results, "next_cursor": next_cursor, "total": total}), 200
+    except IndexWarmingError as e:
+        return jsonify({"error": str(e), "status": "warming"}), 503, {"Retry-After": "5"}
+    except SearchOverloadedError as e:
+        return jsonify({"error": str(e), "status": "overloaded"}), 503, {"Retry-After": "1"}
+    except SearchTimeoutError as e:
+        return jsonify({"error": str(e), "status": "timeout"}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@past_papers.route('/cache/stats', methods=['GET'])
+def cache_stats_api():
+    return jsonify(get_cache_stats()), 200
+
+@past_papers.route('/search/stats', methods=['GET'])
+def search_stats_api():
+    return jsonify(search_executor.stats()), 200
@@ -0,0 +1,313 @@
+"""
+past_index.py
+Persistent vector index for the past research and capstone collections.
+Every indexed paper is keyed by its MongoDB _id and a hash of the fields we
+embed, so a restart only re-embeds papers that are new or have changed.
+
+Each embedding model gets its own index directory (INDEX_DIR/<model slug>),
+so vectors from different models are never mixed. active_index.json names
+the model whose index is served; migrate_embeddings.py builds a new model's
+index next to the live one and then flips that pointer atomically.
+
+Every write to a persisted index (startup sync, admin upserts, migrations)
+holds index_write_lock(), a file lock in the model's index directory, so the
+worker processes of a pre-fork server never write the same files at once.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the single-process dev server runs there
+    fcntl = None
+
+from database import PAPER_FIELDS
+from embedding_models import EMBEDDING_MODEL_NAME
+from embedding_pipeline import iter_chunks
+
+# Which vector store backs the retrievers:
+#   chroma      - persistent Chroma collection (default)
+#   numpy       - brute-force float32 matrix (numpy_index.py)
+#   numpy-int8  - same, with int8-quantized vectors
+#   hnsw        - approximate nearest neighbours via hnswlib (hnsw_index.py)
+SEARCH_BACKEND = os.getenv("PAST_SEARCH_BACKEND", "chroma")
+
+# Every backend keeps its files here between restarts
+INDEX_DIR = os.getenv(
+    "PAST_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_store"),
+)
+
+ACTIVE_INDEX_FILE = os.path.join(INDEX_DIR, "active_index.json")
+
+# Upper bound on how many documents are embedded and written per call
+SYNC_BATCH_SIZE = int(os.getenv("PAST_INDEX_SYNC_BATCH", "500"))
+
+# Fields that end up in the embedded text / metadata of a paper
+HASHED_FIELDS = PAPER_FIELDS
+
+# Bumped whenever the stored metadata layout changes. Entries with an older
+# version get their metadata rewritten on the next sync, without re-embedding
+# (the content hash only covers the embedded fields).
+METADATA_VERSION = 2
+
+YEAR_RE = re.compile(r"\d{4}")
+
+
+def content_hash(doc):
+    """Stable hash of the searchable fields of a MongoDB paper document"""
+    digest = hashlib.sha1()
+    for field in HASHED_FIELDS:
+        digest.update(str(doc.get(field, "")).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def year_number(value):
+    """Numeric year for filtering ("2021", 2021.0, "2021/22" -> 2021), 0 if unknown"""
+    match = YEAR_RE.search(str(value))
+    return int(match.group()) if match else 0
+
+
+# -------------------------------------------------
+# Metadata filters
+# Shared format understood by every backend:
+#   {"year_min": int, "year_max": int, "universities": [str, ...]}
+# Missing keys mean "no constraint".
+# -------------------------------------------------
+def parse_filters(raw):
+    """Validate the `filters` object of a search request; raises ValueError"""
+    raw = raw or {}
+    filters = {}
+    for key in ("year_min", "year_max"):
+        if raw.get(key) not in (None, ""):
+            try:
+                filters[key] = int(raw[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a year")
+    university = raw.get("university") or raw.get("universities")
+    if university:
+        if isinstance(university, (list, tuple)):
+            filters["universities"] = [str(u) for u in university]
+        elif isinstance(university, (str, int, float)):
+            filters["universities"] = [str(university)]
+        else:
+            raise ValueError("university must be a name or a list of names")
+    return filters
+
+
+def filters_key(filters):
+    """Hashable form of a filters dict, for cache keys"""
+    return tuple(sorted((key, tuple(value) if isinstance(value, list) else value)
+                        for key, value in (filters or {}).items()))
+
+
+def matches_filters(metadata, filters):
+    year = metadata.get("year_num", 0)
+    if "year_min" in filters and year < filters["year_min"]:
+        return False
+    if "year_max" in filters and year > filters["year_max"]:
+        return False
+    if "universities" in filters and metadata.get("university") not in filters["universities"]:
+        return False
+    return True
+
+
+def to_chroma_where(filters):
+    """Translate the shared filter format into a Chroma `where` clause"""
+    clauses = []
+    if "year_min" in filters:
+        clauses.append({"year_num": {"$gte": filters["year_min"]}})
+    if "year_max" in filters:
+        clauses.append({"year_num": {"$lte": filters["year_max"]}})
+    if "universities" in filters:
+        clauses.append({"university": {"$in": filters["universities"]}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def filtered_search(vectorstore, query, k, filters=None):
+    """similarity_search with the filters pushed into whichever backend is in use"""
+    if not filters:
+        return vectorstore.similarity_search(query, k=k)
+    if hasattr(vectorstore, "upsert_embeddings"):
+        return vectorstore.similarity_search(query, k=k, filter=filters)
+    return vectorstore.similarity_search(query, k=k, filter=to_chroma_where(filters))
+
+
+# -------------------------------------------------
+# Index versions (one per embedding model)
+# -------------------------------------------------
+def model_slug(model_spec):
+    return re.sub(r"[^A-Za-z0-9]+", "-", model_spec).strip("-").lower()
+
+
+def model_index_dir(model_spec):
+    return os.path.join(INDEX_DIR, model_slug(model_spec))
+
+
+def read_active_model(default=EMBEDDING_MODEL_NAME):
+    """Model spec whose index is currently served, or `default` if none was recorded"""
+    try:
+        with open(ACTIVE_INDEX_FILE, encoding="utf-8") as f:
+            return json.load(f)["model"]
+    except (OSError, ValueError, KeyError):
+        return default
+
+
+def write_active_model(model_spec):
+    """Point the served index at `model_spec` (atomic rename, safe for concurrent readers)"""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = ACTIVE_INDEX_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_spec,
+            "index_dir": model_slug(model_spec),
+            "switched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }, f)
+    os.replace(tmp_path, ACTIVE_INDEX_FILE)
+
+
+_write_thread_lock = threading.Lock()
+
+
+@contextmanager
+def index_write_lock(model_spec=None):
+    """Exclusive lock on the index directory of `model_spec`, across threads and processes"""
+    base_dir = model_index_dir(model_spec or read_active_model())
+    os.makedirs(base_dir, exist_ok=True)
+    with _write_thread_lock, open(os.path.join(base_dir, ".write.lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def open_vectorstore(collection_name, embeddings_model, backend=SEARCH_BACKEND, model_spec=None):
+    """
+    Open (or create) a vector store for `collection_name`, persisted under the
+    index directory of `model_spec` (the active model when omitted)
+    """
+    base_dir = model_index_dir(model_spec or read_active_model())
+    os.makedirs(base_dir, exist_ok=True)
+
+    if backend in ("numpy", "numpy-int8"):
+        from numpy_index import NumpyVectorStore
+
+        return NumpyVectorStore(
+            embeddings_model,
+            persist_directory=os.path.join(base_dir, backend, collection_name),
+            quantize=(backend == "numpy-int8"),
+        )
+
+    if backend == "hnsw":
+        from hnsw_index import HnswVectorStore
+
+        return HnswVectorStore(
+            embeddings_model,
+            persist_directory=os.path.join(base_dir, backend, collection_name),
+        )
+
+    # Imported lazily: chromadb is slow to import and unused by the numpy backends
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=embeddings_model,
+        persist_directory=os.path.join(base_dir, "chroma"),
+    )
+
+
+def upsert_documents(vectorstore, documents, pipeline=None):
+    """
+    Embed and write documents (any iterable), replacing any existing vectors
+    with the same _id. Bulk syncs pass an EmbeddingPipeline
+    (embedding_pipeline.py) for batched, multi-process encoding; single
+    admin writes go through the vectorstore.
+    """
+    if pipeline is not None:
+        return pipeline.index_documents(vectorstore, documents)
+
+    for batch in iter_chunks(documents, SYNC_BATCH_SIZE):
+        vectorstore.add_documents(batch, ids=[doc.metadata["_id"] for doc in batch])
+
+
+def delete_documents(vectorstore, doc_ids):
+    """Remove vectors by _id"""
+    if doc_ids:
+        vectorstore.delete(ids=list(doc_ids))
+
+
+def update_metadatas(vectorstore, documents):
+    """Rewrite the stored metadata of already-embedded documents, keeping their vectors"""
+    for start in range(0, len(documents), SYNC_BATCH_SIZE):
+        batch = documents[start:start + SYNC_BATCH_SIZE]
+        ids = [doc.metadata["_id"] for doc in batch]
+        metadatas = [doc.metadata for doc in batch]
+        if hasattr(vectorstore, "update_metadatas"):
+            vectorstore.update_metadatas(ids, metadatas)
+        else:
+            vectorstore._collection.update(ids=ids, metadatas=metadatas)
+
+
+def get_indexed_metadatas(vectorstore):
+    """Return {_id: metadata} for everything already stored in the index"""
+    existing = vectorstore.get(include=["metadatas"])
+    return {
+        doc_id: metadata or {}
+        for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+
+
+def sync_vectorstore(vectorstore, documents, pipeline=None):
+    """
+    Bring a persisted vectorstore in line with the given LangChain documents
+    (any iterable, consumed in one pass).
+    Only documents whose content hash differs from the stored one are embedded;
+    unchanged documents stored with an older METADATA_VERSION only get their
+    metadata rewritten; ids that are no longer present in MongoDB are removed.
+    """
+    indexed = get_indexed_metadatas(vectorstore)
+    current_ids = set()
+    outdated = []
+    stats = {"embedded": 0, "metadata_updated": 0, "deleted": 0, "unchanged": 0}
+
+    def changed_documents():
+        # Streams into the embedder; unchanged documents are dropped on the way
+        for doc in documents:
+            doc_id = doc.metadata["_id"]
+            current_ids.add(doc_id)
+            stored = indexed.get(doc_id)
+            if stored is None or stored.get("content_hash") != doc.metadata["content_hash"]:
+                stats["embedded"] += 1
+                yield doc
+            elif stored.get("metadata_version", 1) < METADATA_VERSION:
+                outdated.append(doc)
+                if len(outdated) == SYNC_BATCH_SIZE:
+                    update_metadatas(vectorstore, outdated)
+                    stats["metadata_updated"] += len(outdated)
+                    outdated.clear()
+            else:
+                stats["unchanged"] += 1
+
+    upsert_documents(vectorstore, changed_documents(), pipeline=pipeline)
+    update_metadatas(vectorstore, outdated)
+    stats["metadata_updated"] += len(outdated)
+
+    stale_ids = [doc_id for doc_id in indexed if doc_id not in current_ids]
+    delete_documents(vectorstore, stale_ids)
+    stats["deleted"] = len(stale_ids)
+
+    if stats["embedded"] or stats["metadata_updated"] or stale_ids:
+        vectorstore.persist()
+    return stats
@@ -0,0 +1,103 @@
+"""
+past_search_asgi.py
+ASGI (FastAPI) serving mode for past-research search.
+
+Same endpoints and responses as the /past blueprint in pastMongo.py, but the
+event loop never blocks: every search is awaited on the bounded search pool
+(search_executor.py), so a slow encode or a cold index build only occupies
+a pool worker, and overload is shed with 503 instead of queueing requests.
+/past/default reads Mongo through the async driver (async_database.py), so
+it needs no pool worker at all.
+
+    uvicorn past_search_asgi:app --port 5002
+"""
+
+import json
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from async_database import find_papers
+from pastMongo import (
+    IndexWarmingError,
+    _ndjson_lines,
+    format_default_project,
+    get_cache_stats,
+    parse_search_request,
+    search_page,
+    warm_up,
+)
+from search_executor import SearchOverloadedError, SearchTimeoutError, search_executor
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.on_event("startup")
+async def start_warmup():
+    # Build the index off the event loop; search answers from BM25 until ready
+    if os.getenv("PAST_WARMUP", "blocking") != "off":
+        warm_up(background=True)
+
+
+@app.get("/past/default")
+async def default_pastpapers(type: str = "research", skip: int = 0):
+    try:
+        papers = await find_papers(type if type == "capstone" else "research", limit=10, skip=max(0, skip))
+        return {"results": [format_default_project(doc) for doc in papers]}
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.post("/past/search")
+async def search_api(request: Request):
+    try:
+        try:
+            data = await request.json()
+        except json.JSONDecodeError:
+            data = {}
+
+        try:
+            query, collection_type, filters, page_size, cursor = parse_search_request(data)
+            results, next_cursor, total = await search_executor.run_async(
+                search_page, query, collection_type, filters, page_size, cursor
+            )
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        if data.get("stream") or "application/x-ndjson" in request.headers.get("accept", ""):
+            return StreamingResponse(_ndjson_lines(results, next_cursor, total), media_type="application/x-ndjson")
+
+        return {"results": results, "next_cursor": next_cursor, "total": total}
+    except IndexWarmingError as e:
+        return JSONResponse({"error": str(e), "status": "warming"}, status_code=503, headers={"Retry-After": "5"})
+    except SearchOverloadedError as e:
+        return JSONResponse({"error": str(e), "status": "overloaded"}, status_code=503, headers={"Retry-After": "1"})
+    except SearchTimeoutError as e:
+        return JSONResponse({"error": str(e), "status": "timeout"}, status_code=504)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.get("/past/cache/stats")
+async def cache_stats_api():
+    return get_cache_stats()
+
+
+@app.get("/past/search/stats")
+async def search_stats_api():
+    return search_executor.stats()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=5002)
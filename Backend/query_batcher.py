@@ -0,0 +1,100 @@
+"""
+query_batcher.py
+Micro-batching of concurrent query embeddings.
+
+Sentence-transformers encodes a batch of queries in one forward pass for
+little more than the cost of a single query, so when several searches arrive
+together their queries are encoded together. A background thread takes the
+first waiting query, collects whatever else arrives within
+QUERY_BATCH_WAIT_MS (up to QUERY_BATCH_MAX queries), encodes them in one call
+and hands each vector back to its caller.
+
+A lone query only waits the (few ms) collection window, which is small next
+to the encode itself. QUERY_BATCH_MAX=1 turns batching off.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "16"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("QUERY_BATCH_WAIT_MS", "2"))
+
+
+class MicroBatchEmbeddings(Embeddings):
+    """
+    Wraps a LangChain Embeddings object; embed_query calls from different
+    threads are merged into batched embed_documents calls on the base model.
+    """
+
+    def __init__(self, base, max_batch=QUERY_BATCH_MAX, max_wait_ms=QUERY_BATCH_WAIT_MS):
+        self.base = base
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.SimpleQueue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.queries = 0
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        if self.max_batch == 1:
+            return self.base.embed_query(text)
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        # Started lazily so a model loaded before fork gets its thread in the worker
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.base.embed_documents(texts) if len(texts) > 1 else [self.base.embed_query(texts[0])]
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            with self._stats_lock:
+                self.batches += 1
+                self.queries += len(batch)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "queries": self.queries,
+                "avg_batch": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            }
@@ -0,0 +1,93 @@
+"""
+response_cache.py
+Pre-serialized JSON responses for read-mostly landing-page endpoints
+(/past/default, /mentors/default).
+
+The JSON body is encoded once and kept as bytes with its ETag, so a cache
+hit costs neither a Mongo round trip nor a re-serialization, and a browser
+that sends a matching If-None-Match gets an empty 304. Entries expire after
+DEFAULT_RESPONSE_TTL_S and are dropped by namespace when admin endpoints
+write to the underlying collections. A body built while such a write
+invalidated the cache is returned but not stored, so it cannot outlive the
+write.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+
+DEFAULT_RESPONSE_TTL_S = float(os.getenv("DEFAULT_RESPONSE_TTL_S", "300"))
+DEFAULT_RESPONSE_CACHE_SIZE = int(os.getenv("DEFAULT_RESPONSE_CACHE_SIZE", "64"))
+
+
+class ResponseCache:
+    """Thread-safe LRU {(namespace, *key): (body bytes, etag, expires_at)} with TTL"""
+
+    def __init__(self, ttl=DEFAULT_RESPONSE_TTL_S, maxsize=DEFAULT_RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        # Bumped by every invalidate(); a build that straddles one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Return (body, etag) for `key`, calling build() for the payload on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                del self._data[key]
+            self.misses += 1
+            generation = self._generation
+
+        body = json.dumps(build(), separators=(",", ":"), default=str).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        with self._lock:
+            if self._generation == generation:
+                self._data[key] = (body, etag, now + self.ttl)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return body, etag
+
+    def invalidate(self, namespace=None):
+        """Drop every entry of `namespace` (all entries when None)"""
+        with self._lock:
+            self._generation += 1
+            if namespace is None:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if k[0] == namespace]:
+                    del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+default_responses = ResponseCache()
+
+
+def cached_json_response(key, build, cache=default_responses):
+    """Flask response for a cached JSON payload, 304 when the client's ETag matches"""
+    body, etag = cache.get_or_build(key, build)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    # Browsers may keep the body but must revalidate, so admin edits show up at once
+    response.headers["Cache-Control"] = "no-cache"
+    return response
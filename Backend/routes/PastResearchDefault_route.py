@@ -1,22 +1,15 @@
 from flask import Blueprint, jsonify
-import pandas as pd
+from dataset_cache import load_dataset
+from dataset_records import DEFAULT_PROJECT_FIELDS, dataframe_to_records
 
 # Load dataset here (or from a service)
-df = pd.read_excel("./datas/sample_research_dataset_detailed.xlsx")
+df = load_dataset("./datas/sample_research_dataset_detailed.xlsx")
 df.fillna("N/A", inplace=True)
 
 default_bp = Blueprint("default_bp", __name__)
 
 def get_default_projects(limit=5):
-    results = []
-    for idx, row in df.head(limit).iterrows():
-        results.append({
-            "title": row["Title"],
-            "authors": row["Author"],
-            "description": row["Abstract"],
-            "year": row["Year"],
-        })
-    return results
+    return dataframe_to_records(df, DEFAULT_PROJECT_FIELDS, limit=limit)
 
 @default_bp.route("/", methods=["GET"])
 def default_api():
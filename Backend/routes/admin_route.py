@@ -19,6 +19,8 @@ from controller.admin_controller import (
     bulk_upload_research,
     get_dashboard_stats
 )
+from controller.bulk_ingest import SUPPORTED_EXTENSIONS
+from controller.bulk_jobs import get_job_status, submit_job
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -34,7 +36,10 @@ def get_users():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 5))
         
-        result = get_all_users(search_query, page, per_page)
+        # ?cursor=<next_cursor> pages by keyset instead of offset
+        cursor = request.args.get('cursor')
+        
+        result = get_all_users(search_query, page, per_page, cursor)
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -99,7 +104,9 @@ def get_research_entries():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
         
-        result = get_all_research_entries(page, per_page)
+        cursor = request.args.get('cursor')
+        
+        result = get_all_research_entries(page, per_page, cursor)
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -155,7 +162,7 @@ def remove_research_entry(research_id):
 
 @admin_bp.route('/research/bulk-upload', methods=['POST'])
 def bulk_upload():
-    """Bulk upload research entries from Excel file"""
+    """Bulk upload research entries from an Excel, CSV or Parquet file"""
     try:
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
@@ -164,11 +171,35 @@ def bulk_upload():
         if file.filename == '':
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return jsonify({'success': False, 'error': 'Invalid file format. Please upload .xlsx or .xls'}), 400
+        if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            return jsonify({'success': False, 'error': 'Invalid file format. Please upload .xlsx, .xls, .csv or .parquet'}), 400
         
-        result = bulk_upload_research(file)
-        return jsonify(result), 200
+        # ?wait=true keeps the old behaviour of ingesting inside the request
+        if request.args.get('wait') == 'true':
+            result = bulk_upload_research(file.stream, file.filename)
+            return jsonify(result), 200
+        
+        job = submit_job(file, file.filename, 'research_entries')
+        return jsonify({
+            'success': True,
+            'job_id': job['_id'],
+            'status': job['status'],
+            'total_rows': job['total_rows'],
+            'status_url': f"{request.script_root}{request.path}/{job['_id']}",
+            'message': 'Upload queued'
+        }), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/research/bulk-upload/<job_id>', methods=['GET'])
+def bulk_upload_status(job_id):
+    """Progress of a bulk upload job: rows processed, rows/sec, failures, ETA"""
+    try:
+        job = get_job_status(job_id)
+        if job:
+            return jsonify({'success': True, 'job': job}), 200
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from controller.PastresearchSearch_controller import search_projects
+from controller.PastresearchSearch_controller import search_projects, get_cache_stats
 
 search_bp = Blueprint("search_bp", __name__)
 
@@ -15,3 +15,7 @@ def search_api():
         return jsonify({"results": results}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@search_bp.route("/cache/stats", methods=["GET"])
+def cache_stats_api():
+    return jsonify(get_cache_stats()), 200
@@ -0,0 +1,97 @@
+"""
+search_cache.py
+Small in-process caches for the past-research search path:
+- TTLCache: bounded LRU with optional expiry and hit/miss counters
+- CachedEmbeddings: LangChain embeddings wrapper that memoises query vectors
+"""
+
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL_S = float(os.getenv("QUERY_CACHE_TTL_S", "86400"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "600"))
+
+
+def normalize_query(query):
+    """Collapse whitespace and case so "  IoT " and "iot" share a cache entry"""
+    return " ".join(str(query).split()).lower()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with an optional time-to-live per entry"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps another LangChain Embeddings object and caches embed_query results,
+    keyed by normalized query text. The caller's text is what gets encoded,
+    so a cache miss returns the same vector as the unwrapped model. Document
+    embedding is passed straight through.
+    Vectors are stored as float32 arrays to keep the cache compact.
+    """
+
+    def __init__(self, base, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL_S):
+        self.base = base
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = array("f", self.base.embed_query(text))
+            self.cache.set(key, vector)
+        return vector.tolist()
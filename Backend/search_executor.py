@@ -0,0 +1,110 @@
+"""
+search_executor.py
+Bounded worker pool for past-research searches.
+
+Query encoding and index lookups run on a dedicated pool instead of the
+request thread. Admission control caps the work in flight at
+workers + queue depth: past that, new searches are rejected straight away
+(SearchOverloadedError -> 503) rather than piling up, and a search that
+waits longer than the timeout is abandoned (SearchTimeoutError -> 504).
+
+    PAST_SEARCH_WORKERS     concurrent searches
+    PAST_SEARCH_QUEUE       searches allowed to wait for a worker
+    PAST_SEARCH_TIMEOUT_S   seconds a caller waits for its result
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+SEARCH_WORKERS = int(os.getenv("PAST_SEARCH_WORKERS", "4"))
+SEARCH_QUEUE = int(os.getenv("PAST_SEARCH_QUEUE", "32"))
+SEARCH_TIMEOUT_S = float(os.getenv("PAST_SEARCH_TIMEOUT_S", "10"))
+
+
+class SearchOverloadedError(Exception):
+    """Raised when the search pool and its queue are full"""
+
+
+class SearchTimeoutError(Exception):
+    """Raised when a search did not finish within the timeout"""
+
+
+class SearchExecutor:
+    """ThreadPoolExecutor with a hard limit on queued work and per-call timeouts"""
+
+    def __init__(self, workers=SEARCH_WORKERS, max_queue=SEARCH_QUEUE, timeout=SEARCH_TIMEOUT_S):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="past-search")
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue `fn` on the pool, or raise SearchOverloadedError if it is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise SearchOverloadedError("Search is busy, please retry shortly")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None and not future.cancelled():
+                self._completed += 1
+        self._slots.release()
+
+    def _timed_out_call(self, future):
+        # A search still waiting in the queue is dropped; a running one finishes
+        # in the background (its result may still land in the result cache)
+        future.cancel()
+        with self._lock:
+            self._timed_out += 1
+        return SearchTimeoutError(f"Search timed out after {self.timeout:g}s")
+
+    def run(self, fn, *args, **kwargs):
+        """Run `fn` on the pool and wait for its result (for WSGI handlers)"""
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise self._timed_out_call(future)
+
+    async def run_async(self, fn, *args, **kwargs):
+        """Await `fn` on the pool without blocking the event loop (for ASGI handlers)"""
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out_call(future)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+
+search_executor = SearchExecutor()